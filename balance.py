@@ -0,0 +1,259 @@
+import argparse
+import ast
+import csv
+import itertools
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from settings import *
+from tiles import WALL, FAKE_EXIT
+from maze import Maze
+from simulation import Simulation, TickInput
+from validate import collect
+
+# Plays levels headlessly with a scripted bot, many seeded episodes per
+# level and parameter combination, spread over worker processes.
+#
+#   python balance.py levels --episodes 50 --set MONSTER_SPEED=2.2,2.6,3.0 \
+#       --set monster_color=level,red --csv balance.csv --json balance.json
+#
+# Parameters are the settings.py names in SWEEPABLE; every combination of
+# the given values is run with the same episode seeds, so combinations are
+# compared on identical monster behaviour. monster_color is special:
+# "level" keeps the level's colours, anything else repaints every monster.
+
+BOT_MAX_SECONDS = 180
+BOT_MAX_TURN = 150  # mouse counts per tick
+BOT_FLEE_DISTANCE = 5.0
+BOT_RUN_RESERVE = 0.5
+
+# settings the game code reads while it runs: patched into every module
+PATCHED = {"MONSTER_SPEED", "CATCH_RADIUS", "PLAYER_WALK_SPEED", "PLAYER_RUN_SPEED",
+           "STAMINA_MAX", "STAMINA_DRAIN", "STAMINA_REGEN"}
+# settings bound when objects are built: passed to each Simulation instead
+PASSED = {"SIGHT_RADIUS", "NAV_RADIUS", "TICK_RATE"}
+SWEEPABLE = PATCHED | PASSED | {"monster_color"}
+
+# ---------------- PARAMETERS ----------------
+def parse_sets(specs):
+    # ["NAME=1,2", ...] -> (names, list of value tuples)
+    names, values = [], []
+    for spec in specs:
+        name, _, raw = spec.partition("=")
+        if name not in SWEEPABLE:
+            raise SystemExit(f"cannot sweep {name}; choose from {', '.join(sorted(SWEEPABLE))}")
+        names.append(name)
+        values.append([_literal(v) for v in raw.split(",")])
+    return names, list(itertools.product(*values))
+
+def _literal(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+def apply_params(params):
+    # Settings are star-imported, so each game module holds its own copy
+    # of the constants; patch every copy.
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in list(sys.modules.values()):
+        if os.path.dirname(os.path.abspath(getattr(module, "__file__", None) or "/")) != here:
+            continue
+        for name, value in params.items():
+            if name in PATCHED and hasattr(module, name):
+                setattr(module, name, value)
+
+# ---------------- BOT ----------------
+def exit_distances(maze):
+    # steps to the exit from every tile; fake exits count as walls
+    cells = maze.cells
+    stride = maze.stride
+    dist = array("i", [-1]) * len(cells)
+    source = maze.index(*maze.exit)
+    dist[source] = 0
+    queue = deque([source])
+    while queue:
+        i = queue.popleft()
+        d = dist[i] + 1
+        for n in (i + 1, i - 1, i + stride, i - stride):
+            if dist[n] < 0 and cells[n] != WALL and cells[n] != FAKE_EXIT:
+                dist[n] = d
+                queue.append(n)
+    return dist
+
+class Bot:
+    # Walks the shortest path to the exit, from tile centre to tile centre,
+    # turning at most BOT_MAX_TURN mouse counts per tick and running while
+    # a monster is within BOT_FLEE_DISTANCE.
+    def __init__(self, maze, dist):
+        self.maze = maze
+        self.dist = dist
+
+    def act(self, sim, nearest):
+        p = sim.player
+        maze = self.maze
+        stride = maze.stride
+        i = maze.index(p.x, p.y)
+        d = self.dist[i]
+        if d < 0:
+            return TickInput(False, False, False, False, False, 0)
+
+        target = i
+        for n in (i + 1, i - 1, i + stride, i - stride):
+            if self.dist[n] == d - 1:
+                target = n
+                break
+        tx = target % stride - 1 + 0.5
+        ty = target // stride - 1 + 0.5
+
+        diff = (math.atan2(ty - p.y, tx - p.x) - p.angle + math.pi) % math.tau - math.pi
+        turn = max(-BOT_MAX_TURN, min(BOT_MAX_TURN, round(diff / MOUSE_SENSITIVITY)))
+        facing = abs(diff - turn * MOUSE_SENSITIVITY) < 0.5
+        run = nearest < BOT_FLEE_DISTANCE and p.stamina > BOT_RUN_RESERVE
+        return TickInput(facing, False, False, False, run, turn)
+
+# ---------------- EPISODES ----------------
+_levels = {}
+
+def _level(path):
+    # parsed once per worker process
+    if path not in _levels:
+        maze = Maze(path)
+        _levels[path] = (maze, exit_distances(maze))
+    return _levels[path]
+
+def run_episode(task):
+    path, params, seed = task
+    apply_params(params)
+    base, dist = _level(path)
+    maze = base.clone()
+    color = params.get("monster_color", "level")
+    if color != "level":
+        maze.monsters_info = [(color, pos) for _, pos in base.monsters_info]
+
+    # the cached level is never changed: the swept radii and tick rate go
+    # into this episode's own Simulation (and Visibility, if it differs)
+    sim = Simulation(maze, seed, 1 / params.get("TICK_RATE", TICK_RATE),
+                     params.get("SIGHT_RADIUS", SIGHT_RADIUS), params.get("NAV_RADIUS", NAV_RADIUS))
+    bot = Bot(maze, dist)
+    player = sim.player
+    closest = math.inf
+    stamina_used = 0.0
+    fake_exits = 0
+    max_ticks = int(BOT_MAX_SECONDS / sim.dt)
+
+    while sim.status == "playing" and sim.tick < max_ticks:
+        nearest = min((math.hypot(m.x - player.x, m.y - player.y) for m in sim.monsters), default=math.inf)
+        closest = min(closest, nearest)
+        before = player.stamina
+        sim.step(bot.act(sim, nearest))
+        stamina_used += max(0.0, before - player.stamina)
+        fake_exits += "fake_exit" in sim.events
+
+    return {
+        "level": path,
+        **{k: v for k, v in params.items()},
+        "seed": seed,
+        "outcome": sim.status if sim.status != "playing" else "timeout",
+        "time_s": round(sim.tick * sim.dt, 3),
+        "closest": round(closest, 3) if math.isfinite(closest) else None,
+        "stamina_used": round(stamina_used, 3),
+        "fake_exits": fake_exits,
+        "compass": maze.compass_taken,
+    }
+
+# ---------------- REPORT ----------------
+def aggregate(rows, names):
+    groups = {}
+    for row in rows:
+        key = (row["level"],) + tuple(row[n] for n in names)
+        groups.setdefault(key, []).append(row)
+
+    report = []
+    for key, group in groups.items():
+        won = [r for r in group if r["outcome"] == "won"]
+        closest = [r["closest"] for r in group if r["closest"] is not None]
+        report.append({
+            "level": key[0],
+            "params": dict(zip(names, key[1:])),
+            "episodes": len(group),
+            "win_rate": round(len(won) / len(group), 3),
+            "caught_rate": round(sum(r["outcome"] == "caught" for r in group) / len(group), 3),
+            "timeout_rate": round(sum(r["outcome"] == "timeout" for r in group) / len(group), 3),
+            "mean_win_time_s": round(statistics.fmean(r["time_s"] for r in won), 2) if won else None,
+            "median_closest": round(statistics.median(closest), 3) if closest else None,
+            "mean_stamina_used": round(statistics.fmean(r["stamina_used"] for r in group), 3),
+        })
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless bot playthroughs for balancing.")
+    parser.add_argument("paths", nargs="*", default=["levels"], help="level files or directories")
+    parser.add_argument("--episodes", type=int, default=20, help="episodes per level and combination")
+    parser.add_argument("--seed", type=int, default=0, help="first episode seed")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2",
+                        help="sweep a setting (repeatable; all combinations are run)")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--csv", default="balance.csv", help="per-episode results ('' to skip)")
+    parser.add_argument("--json", default="balance.json", help="aggregated report ('' to skip)")
+    args = parser.parse_args(argv)
+
+    names, combos = parse_sets(args.set)
+    levels = [p for p in collect(args.paths) if Maze(p).exit is not None]
+    tasks = [(path, dict(zip(names, combo)), args.seed + k)
+             for path in levels for combo in combos for k in range(args.episodes)]
+
+    fields = ["level", *names, "seed", "outcome", "time_s", "closest", "stamina_used", "fake_exits", "compass"]
+    out = open(args.csv, "w", newline="") if args.csv else None
+    writer = csv.DictWriter(out, fieldnames=fields) if out else None
+    if writer:
+        writer.writeheader()
+
+    start = time.perf_counter()
+    rows = []
+    workers = args.jobs or os.cpu_count() or 1
+    chunk = max(1, len(tasks) // (8 * workers))
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(run_episode, tasks, chunksize=chunk)
+    else:
+        pool = None
+        results = map(run_episode, tasks)
+
+    # results arrive in task order as workers finish them
+    for row in results:
+        rows.append(row)
+        if writer:
+            writer.writerow(row)
+            out.flush()
+    if pool:
+        pool.shutdown()
+    if out:
+        out.close()
+
+    elapsed = time.perf_counter() - start
+    played = sum(r["time_s"] for r in rows)
+    report = aggregate(rows, names)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"episodes": len(rows), "seconds": round(elapsed, 2), "groups": report}, f, indent=2)
+
+    for g in report:
+        params = " ".join(f"{k}={v}" for k, v in g["params"].items())
+        win_time = f"{g['mean_win_time_s']}s" if g["mean_win_time_s"] is not None else "-"
+        print(f"{g['level']:24} {params:30} won {g['win_rate']:.0%} caught {g['caught_rate']:.0%} "
+              f"timeout {g['timeout_rate']:.0%}  win time {win_time}  "
+              f"closest {g['median_closest']}  stamina {g['mean_stamina_used']}")
+    print(f"{len(rows)} episodes, {played:.0f}s of play in {elapsed:.1f}s "
+          f"({played / max(elapsed, 1e-9):.0f}x real time) on {workers} processes")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
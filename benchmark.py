@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from settings import *
+from maze import Maze
+from player import Player
+from monster import Monster
+from navigation import FlowField
+from spatial import SpatialHash
+from raycast import render
+
+# ---------------- STRESS LEVELS ----------------
+def stress_map(size, monsters, seed=0):
+    # Open maze with random pillars: the worst case for long rays.
+    rng = random.Random(seed)
+    rows = [["#"] * size]
+    for _ in range(size - 2):
+        rows.append(["#"] + ["#" if rng.random() < 0.15 else "." for _ in range(size - 2)] + ["#"])
+    rows.append(["#"] * size)
+
+    free = [(x, y) for y in range(1, size - 1) for x in range(1, size - 1)]
+    rng.shuffle(free)
+    markers = ["P", "E", "C"] + ["F"] * (size // 4) + [rng.choice("RBG") for _ in range(monsters)]
+    for (x, y), m in zip(free, markers):
+        rows[y][x] = m
+    return {"map": ["".join(r) for r in rows]}
+
+def level_cases(tmp, stress_sizes, stress_monsters):
+    cases = []
+    for name in sorted(os.listdir("levels")):
+        if name.endswith(".json"):
+            cases.append((name[:-5], os.path.join("levels", name)))
+
+    for size in stress_sizes:
+        for count in stress_monsters:
+            path = os.path.join(tmp, f"stress-{size}-m{count}.json")
+            with open(path, "w") as f:
+                json.dump(stress_map(size, count), f)
+            cases.append((f"stress-{size}-m{count}", path))
+    return cases
+
+# ---------------- TIMING ----------------
+def summarize(samples):
+    samples = sorted(samples)
+    def pct(p):
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": pct(50),
+        "p90_ms": pct(90),
+        "p99_ms": pct(99),
+        "max_ms": samples[-1] * 1000,
+    }
+
+def bench_load(path, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Maze(path)
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+def bench_render(maze, frames):
+    screen = pygame.Surface((WIDTH, HEIGHT))
+    player = Player(maze.player_start)
+    actors = SpatialHash()
+    for color, pos in maze.monsters_info:
+        actors.insert(Monster(color, pos), "monster", *pos)
+    times = []
+    for i in range(frames):
+        player.angle = i * math.tau / frames
+        start = time.perf_counter()
+        screen.fill((15, 15, 15))
+        render(screen, player, maze, actors)
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+def bench_monsters(maze, ticks):
+    rng = random.Random(1)
+    player = Player(maze.player_start)
+    monsters = [Monster(color, pos, rng) for color, pos in maze.monsters_info]
+    flow = FlowField(maze)
+    update_times = []
+    sight_times = []
+    for i in range(ticks):
+        player.angle = i * 0.05
+        start = time.perf_counter()
+        flow.update(player.x, player.y)
+        for monster in monsters:
+            monster.update(player, maze, i % 2 == 0, flow)
+        update_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for monster in monsters:
+            monster.can_see_player(player, maze)
+        sight_times.append(time.perf_counter() - start)
+    return summarize(update_times), summarize(sight_times)
+
+def bench_player_move(maze, ticks):
+    player = Player(maze.player_start)
+    times = []
+    step = PLAYER_RUN_SPEED * SIM_DT
+    for i in range(ticks):
+        angle = i * 0.37
+        start = time.perf_counter()
+        for _ in range(100):
+            player.move(math.cos(angle) * step, math.sin(angle) * step, maze)
+        times.append((time.perf_counter() - start) / 100)
+    return summarize(times)
+
+def run(args):
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="mazebench-") as tmp:
+        for name, path in level_cases(tmp, args.stress_sizes, args.stress_monsters):
+            maze = Maze(path)
+            update, sight = bench_monsters(maze, args.ticks)
+            results[name] = {
+                "load": bench_load(path, args.repeats),
+                "render": bench_render(maze, args.frames),
+                "monster_update": update,
+                "can_see_player": sight,
+                "player_move": bench_player_move(maze, args.ticks),
+            }
+            print(f"{name:>22}  " + "  ".join(
+                f"{stage} {r['p50_ms']:.3f}ms" for stage, r in results[name].items()
+            ))
+    return results
+
+# ---------------- BASELINE ----------------
+def compare(results, baseline, tolerance):
+    # p50 beyond (1 + tolerance) x baseline counts as a regression; tiny
+    # stages get an absolute 0.05 ms of slack against timer noise.
+    regressions = []
+    for case, stages in results.items():
+        for stage, r in stages.items():
+            base = baseline.get(case, {}).get(stage)
+            if base is None:
+                continue
+            limit = base["p50_ms"] * (1 + tolerance) + 0.05
+            if r["p50_ms"] > limit:
+                regressions.append((case, stage, base["p50_ms"], r["p50_ms"]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the game's hot paths.")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="fail if any stage is slower than this results file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write results here")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--stress-sizes", type=int, nargs="*", default=[32, 128, 256])
+    parser.add_argument("--stress-monsters", type=int, nargs="*", default=[4, 32])
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    report = {"backend": RENDER_BACKEND, "python": sys.version.split()[0], "results": results}
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nPERFORMANCE REGRESSION")
+            for case, stage, before, after in regressions:
+                print(f"  {case} {stage}: p50 {before:.3f}ms -> {after:.3f}ms")
+            return 1
+        print("\nno regressions against", args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from settings import *
+from tiles import WALL
+
+class ChunkStore:
+    # Read-only view of a binary level's padded tile array that keeps only
+    # recently used CHUNK_SIZE x CHUNK_SIZE blocks in memory. It indexes
+    # like Maze.cells (flat padded index -> tile code), so is_wall, the ray
+    # caster, visibility and navigation work on it unchanged.
+    def __init__(self, buf, tiles_offset, stride, rows,
+                 chunk_size=CHUNK_SIZE, budget=CHUNK_CACHE_BYTES):
+        if chunk_size & (chunk_size - 1):
+            raise ValueError("chunk size must be a power of two")
+        self.buf = buf
+        self.offset = tiles_offset
+        self.stride = stride
+        self.rows = rows
+        self.size = chunk_size
+        self.shift = chunk_size.bit_length() - 1
+        self.mask = chunk_size - 1
+        self.chunks_x = -(-stride // chunk_size)
+        self.capacity = max(4, budget // (chunk_size * chunk_size))
+        self.chunks = OrderedDict()
+        self.loads = 0
+        self._last_key = None
+        self._last = None
+
+    def __len__(self):
+        return self.stride * self.rows
+
+    def __getitem__(self, i):
+        y, x = divmod(i, self.stride)
+        key = (y >> self.shift) * self.chunks_x + (x >> self.shift)
+        if key != self._last_key:
+            self._last = self._chunk(key)
+            self._last_key = key
+        return self._last[((y & self.mask) << self.shift) | (x & self.mask)]
+
+    def _chunk(self, key):
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        size = self.size
+        cy, cx = divmod(key, self.chunks_x)
+        x0, y0 = cx * size, cy * size
+        x1 = min(x0 + size, self.stride)
+        # chunks on the far edges are filled out with wall
+        out = bytearray([WALL]) * (size * size)
+        for y in range(y0, min(y0 + size, self.rows)):
+            start = self.offset + y * self.stride
+            row = (y - y0) * size
+            out[row:row + x1 - x0] = self.buf[start + x0:start + x1]
+        chunk = bytes(out)
+
+        self.loads += 1
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.capacity:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def resident_bytes(self):
+        return len(self.chunks) * self.size * self.size
+
+    def read_rect(self, x0, y0, width, height):
+        # padded-coordinate rectangle as a list of row byte strings,
+        # wall outside the level
+        rows = []
+        for y in range(y0, y0 + height):
+            if y < 0 or y >= self.rows:
+                rows.append(bytes([WALL]) * width)
+                continue
+            lo, hi = max(x0, 0), min(x0 + width, self.stride)
+            start = self.offset + y * self.stride
+            row = bytes([WALL]) * (lo - x0) + bytes(self.buf[start + lo:start + hi])
+            rows.append(row + bytes([WALL]) * (width - len(row)))
+        return rows
\ No newline at end of file
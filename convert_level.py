@@ -0,0 +1,44 @@
+import json
+import os
+import sys
+from maze import Maze
+from levelfile import MONSTER_LETTERS, write_level
+
+# Converts between the JSON level layout and the binary .mzl format.
+# The direction is picked from the output file's extension.
+
+def to_binary(maze, out_path):
+    def pos(p):
+        return (int(p[0]), int(p[1])) if p else None
+
+    write_level(
+        out_path, maze.width, maze.height, maze.map,
+        player=pos(maze.player_start), exit=maze.exit, compass=pos(maze.compass_pos),
+        monsters=[(color, int(x), int(y)) for color, (x, y) in maze.monsters_info],
+        fake_exits=maze.fake_exits,
+    )
+
+def level_rows(maze):
+    # the level as lists of tile characters, monsters included
+    rows = [list(row) for row in maze.map]
+    for color, (x, y) in maze.monsters_info:
+        rows[int(y)][int(x)] = MONSTER_LETTERS[color]
+    return rows
+
+def to_json(maze, out_path):
+    rows = level_rows(maze)
+    with open(out_path, "w") as f:
+        json.dump({"map": ["".join(r) for r in rows]}, f, indent=2)
+
+def convert(in_path, out_path):
+    maze = Maze(in_path)
+    if os.path.splitext(out_path)[1] == ".json":
+        to_json(maze, out_path)
+    else:
+        to_binary(maze, out_path)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python convert_level.py IN OUT   (OUT ending in .json or .mzl)")
+        sys.exit(2)
+    convert(sys.argv[1], sys.argv[2])
\ No newline at end of file
@@ -0,0 +1,124 @@
+from array import array
+from collections import deque
+
+class Stroke:
+    # The cells one paint or erase drag changed: coordinates plus the tile
+    # before and after, packed into arrays (10 bytes per cell).
+    __slots__ = ("xs", "ys", "before", "after")
+
+    def __init__(self, xs, ys, before, after):
+        self.xs = xs
+        self.ys = ys
+        self.before = before
+        self.after = after
+
+    @classmethod
+    def from_changes(cls, changes):
+        # changes: {(x, y): (old, new)}
+        return cls(
+            array("I", (x for x, _ in changes)),
+            array("I", (y for _, y in changes)),
+            "".join(old for old, _ in changes.values()).encode("ascii"),
+            "".join(new for _, new in changes.values()).encode("ascii"),
+        )
+
+    def __len__(self):
+        return len(self.xs)
+
+    def nbytes(self):
+        return len(self.xs) * 10 + 200
+
+    def apply(self, grid, tiles):
+        for x, y, t in zip(self.xs, self.ys, tiles.decode("ascii")):
+            grid[y][x] = t
+
+class EditHistory:
+    # Undo/redo as per-stroke deltas. set() writes through to the grid and
+    # remembers each cell's first old value within the open stroke;
+    # end_stroke() packs the changed cells into one entry. Undo and redo
+    # cost O(cells in the stroke). The oldest entries are dropped once the
+    # history holds more than max_bytes.
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.nbytes = 0
+        self.changes = None
+
+    def begin_stroke(self):
+        if self.changes is None:
+            self.changes = {}
+
+    def set(self, grid, x, y, tile):
+        old = grid[y][x]
+        if old == tile:
+            return
+        grid[y][x] = tile
+        single = self.changes is None
+        if single:
+            # an edit outside a drag is a stroke of its own
+            self.begin_stroke()
+        first = self.changes.get((x, y))
+        self.changes[(x, y)] = (first[0] if first else old, tile)
+        if single:
+            self.end_stroke()
+
+    def end_stroke(self):
+        changes, self.changes = self.changes, None
+        # cells painted and then painted back are not changes
+        changes = {k: v for k, v in (changes or {}).items() if v[0] != v[1]}
+        if not changes:
+            return
+        self._push(Stroke.from_changes(changes))
+
+    def fill(self, grid, cells, tile):
+        # Sets every (x, y) in cells to tile as one stroke, without the
+        # per-cell bookkeeping of set(); used by the bulk tools.
+        xs = array("I")
+        ys = array("I")
+        before = []
+        for x, y in cells:
+            row = grid[y]
+            old = row[x]
+            if old != tile:
+                row[x] = tile
+                xs.append(x)
+                ys.append(y)
+                before.append(old)
+        if before:
+            self._push(Stroke(xs, ys, "".join(before).encode("ascii"), tile.encode("ascii") * len(before)))
+        return len(before)
+
+    def _push(self, stroke):
+        for old in self.redo_stack:
+            self.nbytes -= old.nbytes()
+        self.redo_stack.clear()
+
+        self.undo_stack.append(stroke)
+        self.nbytes += stroke.nbytes()
+        while self.nbytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.nbytes -= self.undo_stack.popleft().nbytes()
+
+    def undo(self, grid):
+        if self.changes is not None:
+            self.end_stroke()
+        if not self.undo_stack:
+            return None
+        stroke = self.undo_stack.pop()
+        stroke.apply(grid, stroke.before)
+        self.redo_stack.append(stroke)
+        return stroke
+
+    def redo(self, grid):
+        if not self.redo_stack:
+            return None
+        stroke = self.redo_stack.pop()
+        stroke.apply(grid, stroke.after)
+        self.undo_stack.append(stroke)
+        return stroke
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.nbytes = 0
+        self.changes = None
\ No newline at end of file
@@ -0,0 +1,60 @@
+import os
+import sys
+import pygame
+
+# Minimal keyboard-driven file picker drawn with pygame, used when the Qt
+# dialog is unavailable. Up/Down select, Enter opens a folder or picks a
+# file, Backspace goes to the parent folder, Esc cancels.
+
+def _entries(folder, extensions):
+    try:
+        names = sorted(os.listdir(folder), key=str.lower)
+    except OSError:
+        names = []
+    dirs = [n + "/" for n in names if os.path.isdir(os.path.join(folder, n))]
+    files = [n for n in names if n.lower().endswith(extensions)]
+    return [".."] + dirs + files
+
+def browse(screen, folder="levels", extensions=(".json", ".mzl")):
+    font = pygame.font.SysFont(None, 32)
+    folder = os.path.abspath(folder if os.path.isdir(folder) else ".")
+    entries = _entries(folder, extensions)
+    selected = 0
+    rows = max(1, (screen.get_height() - 120) // 34)
+    dirty = True
+
+    while True:
+        if dirty:
+            screen.fill((0, 0, 0))
+            header = font.render(f"Select level: {folder}", True, (200, 0, 0))
+            screen.blit(header, (40, 30))
+            top = max(0, min(selected - rows // 2, len(entries) - rows))
+            for i, name in enumerate(entries[top:top + rows], start=top):
+                color = (255, 255, 255) if i == selected else (120, 120, 120)
+                screen.blit(font.render(name, True, color), (60, 80 + (i - top) * 34))
+            pygame.display.flip()
+            dirty = False
+
+        e = pygame.event.wait()
+        if e.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if e.type != pygame.KEYDOWN:
+            continue
+
+        dirty = True
+        if e.key == pygame.K_ESCAPE:
+            return None
+        if e.key == pygame.K_UP:
+            selected = (selected - 1) % len(entries)
+        elif e.key == pygame.K_DOWN:
+            selected = (selected + 1) % len(entries)
+        elif e.key in (pygame.K_BACKSPACE, pygame.K_RETURN):
+            name = ".." if e.key == pygame.K_BACKSPACE else entries[selected]
+            path = os.path.normpath(os.path.join(folder, name))
+            if os.path.isdir(path):
+                folder = path
+                entries = _entries(folder, extensions)
+                selected = 0
+            else:
+                return path
\ No newline at end of file
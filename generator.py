@@ -0,0 +1,262 @@
+import argparse
+import random
+import sys
+import time
+from array import array
+from collections import deque
+from settings import *
+from tiles import *
+from levelfile import write_level
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Mazes live on a grid of cells at odd tile coordinates; the tiles between
+# two cells are the walls that carving opens. A perfect maze (exactly one
+# path between any two tiles) comes from the sidewinder algorithm, which
+# works row by row and so vectorizes; braiding then opens a fraction of
+# the dead ends to add loops. Both have an iterative pure-Python fallback.
+
+class GeneratedLevel:
+    def __init__(self, width, height, grid):
+        self.width = width
+        self.height = height
+        self.grid = grid  # height rows of tile codes (NumPy array or bytearrays)
+        self.player = None
+        self.exit = None
+        self.compass = None
+        self.monsters = []  # (color, x, y)
+        self.fake_exits = []
+
+    def rows(self):
+        for row in self.grid:
+            yield bytes(row)
+
+# ---------------- CARVING (NUMPY) ----------------
+def _perfect_np(cw, ch, width, height, rng):
+    grid = np.full((height, width), WALL, dtype=np.uint8)
+    grid[1:2 * ch:2, 1:2 * cw:2] = FLOOR
+    grid[1, 2:2 * cw - 1:2] = FLOOR  # the first row is one corridor
+    if ch == 1:
+        return grid
+
+    east = rng.random((ch - 1, cw)) < 0.5
+    east[:, -1] = False
+    ys, xs = np.nonzero(east)
+    grid[2 * ys + 3, 2 * xs + 2] = FLOOR
+
+    # every run of east-joined cells opens north from one random member
+    ends = np.flatnonzero(~east.ravel())
+    starts = np.r_[0, ends[:-1] + 1]
+    chosen = starts + (rng.random(ends.size) * (ends - starts + 1)).astype(np.int64)
+    grid[2 * (chosen // cw + 1), 2 * (chosen % cw) + 1] = FLOOR
+    return grid
+
+def _braid_np(grid, cw, ch, chance, rng):
+    east = np.zeros((ch, cw), dtype=bool)
+    south = np.zeros((ch, cw), dtype=bool)
+    east[:, :-1] = grid[1:2 * ch:2, 2:2 * cw - 1:2] != WALL
+    south[:-1, :] = grid[2:2 * ch - 1:2, 1:2 * cw:2] != WALL
+    west = np.zeros_like(east)
+    north = np.zeros_like(south)
+    west[:, 1:] = east[:, :-1]
+    north[1:, :] = south[:-1, :]
+
+    openings = east.astype(np.int8) + west + north + south
+    todo = (openings == 1) & (rng.random((ch, cw)) < chance)
+
+    # closed walls that lead to another cell, and the tile each one is at
+    can_open = [~east, ~west, ~south, ~north]
+    can_open[0][:, -1] = False
+    can_open[1][:, 0] = False
+    can_open[2][-1, :] = False
+    can_open[3][0, :] = False
+    wall_at = [(1, 2), (1, 0), (2, 1), (0, 1)]  # (dy, dx) from the cell's top-left
+
+    start = rng.integers(0, 4, (ch, cw))
+    for k in range(4):
+        direction = (start + k) % 4
+        for d in range(4):
+            pick = todo & (direction == d) & can_open[d]
+            ys, xs = np.nonzero(pick)
+            dy, dx = wall_at[d]
+            grid[2 * ys + dy, 2 * xs + dx] = FLOOR
+            todo &= ~pick
+
+# ---------------- CARVING (PURE PYTHON) ----------------
+def _perfect_py(cw, ch, width, height, rng):
+    grid = [bytearray([WALL]) * width for _ in range(height)]
+    for j in range(ch):
+        row = grid[2 * j + 1]
+        above = grid[2 * j]
+        run_start = 0
+        for i in range(cw):
+            row[2 * i + 1] = FLOOR
+            if i < cw - 1 and (j == 0 or rng.random() < 0.5):
+                row[2 * i + 2] = FLOOR
+            elif j > 0:
+                k = rng.randint(run_start, i)
+                above[2 * k + 1] = FLOOR
+                run_start = i + 1
+    return grid
+
+def _braid_py(grid, cw, ch, chance, rng):
+    for j in range(ch):
+        y = 2 * j + 1
+        for i in range(cw):
+            x = 2 * i + 1
+            walls = [(dy, dx) for dy, dx in ((0, 1), (0, -1), (1, 0), (-1, 0))
+                     if grid[y + dy][x + dx] == WALL]
+            if len(walls) != 3 or rng.random() >= chance:
+                continue
+            rng.shuffle(walls)
+            for dy, dx in walls:
+                if 0 <= i + dx < cw and 0 <= j + dy < ch:
+                    grid[y + dy][x + dx] = FLOOR
+                    break
+
+# ---------------- MARKERS ----------------
+def _tree_paths(level, targets):
+    # Tiles on the breadth-first paths from the start to each target.
+    width = level.width
+    cells = b"".join(level.rows())
+    source = level.player[1] * width + level.player[0]
+    parent = array("i", [-1]) * len(cells)
+    parent[source] = source
+    wanted = {y * width + x for x, y in targets}
+    queue = deque([source])
+    # the carved grid keeps a wall border, so neighbours stay in range
+    while queue and wanted:
+        i = queue.popleft()
+        wanted.discard(i)
+        for n in (i + 1, i - 1, i + width, i - width):
+            if parent[n] < 0 and cells[n] != WALL:
+                parent[n] = i
+                queue.append(n)
+
+    path = {level.player}
+    for x, y in targets:
+        i = y * width + x
+        while i != source:
+            path.add((i % width, i // width))
+            i = parent[i]
+    return path
+
+def _place_markers(level, cw, ch, rng, fake_exits, monsters, min_exit_distance,
+                   min_monster_distance):
+    # Every cell is reachable in a perfect or braided maze, and a path is
+    # never shorter than the Manhattan distance, so distance constraints
+    # are checked without searching the maze. Fake exits are the exception:
+    # stepping on one sends the player back to the start, so they are kept
+    # off one path from the start to the exit and to the compass.
+    taken = set()
+
+    def place(what, origin=None, min_distance=0, avoid=(), tries=10000):
+        for _ in range(tries):
+            cell = (2 * rng.randrange(cw) + 1, 2 * rng.randrange(ch) + 1)
+            if cell in taken or cell in avoid:
+                continue
+            if origin and abs(cell[0] - origin[0]) + abs(cell[1] - origin[1]) < min_distance:
+                continue
+            taken.add(cell)
+            return cell
+        if min_distance:
+            raise ValueError(f"could not place {what} at least {min_distance} steps from the start")
+        raise ValueError(f"could not place {what}")
+
+    level.player = place("the start")
+    level.exit = place("the exit", level.player, min_exit_distance)
+    level.compass = place("the compass")
+    for color in monsters:
+        x, y = place(f"a {color} monster", level.player, min_monster_distance)
+        level.monsters.append((color, x, y))
+    if fake_exits:
+        route = _tree_paths(level, (level.exit, level.compass))
+        for _ in range(fake_exits):
+            level.fake_exits.append(place("a fake exit", avoid=route))
+
+    grid = level.grid
+    for (x, y), letter in ((level.player, "P"), (level.exit, "E"), (level.compass, "C")):
+        grid[y][x] = ord(letter)
+    for color, x, y in level.monsters:
+        grid[y][x] = ord({"red": "R", "blue": "B", "green": "G"}[color])
+    for x, y in level.fake_exits:
+        grid[y][x] = FAKE_EXIT
+
+def generate(width, height, seed=None, braid=0.0, fake_exits=0, monsters=("red",),
+             min_exit_distance=None, min_monster_distance=SIGHT_RADIUS, use_numpy=None):
+    cw, ch = (width - 1) // 2, (height - 1) // 2
+    if cw < 2 or ch < 2:
+        raise ValueError("mazes need to be at least 5x5 tiles")
+    if min_exit_distance is None:
+        min_exit_distance = cw + ch
+    if use_numpy is None:
+        use_numpy = np is not None
+
+    rng = random.Random(seed)
+    if use_numpy:
+        np_rng = np.random.default_rng(rng.getrandbits(64))
+        grid = _perfect_np(cw, ch, width, height, np_rng)
+        if braid:
+            _braid_np(grid, cw, ch, braid, np_rng)
+    else:
+        grid = _perfect_py(cw, ch, width, height, rng)
+        if braid:
+            _braid_py(grid, cw, ch, braid, rng)
+
+    level = GeneratedLevel(width, height, grid)
+    _place_markers(level, cw, ch, rng, fake_exits, list(monsters),
+                   min_exit_distance, min_monster_distance)
+    return level
+
+# ---------------- OUTPUT ----------------
+def write_json(level, path):
+    # same {"map": [...]} layout Maze reads, written one row at a time
+    with open(path, "w") as f:
+        f.write('{\n  "map": [\n')
+        last = level.height - 1
+        for y, row in enumerate(level.rows()):
+            f.write('    "' + row.decode("ascii") + ('",\n' if y < last else '"\n'))
+        f.write("  ]\n}")
+
+def write_binary(level, path):
+    write_level(path, level.width, level.height, level.rows(),
+                player=level.player, exit=level.exit, compass=level.compass,
+                monsters=level.monsters, fake_exits=level.fake_exits)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a maze level.")
+    parser.add_argument("out", help="output path (.json, or .mzl with --binary)")
+    parser.add_argument("--width", type=int, default=31)
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--braid", type=float, default=0.0,
+                        help="fraction of dead ends to open into loops (0-1)")
+    parser.add_argument("--fake-exits", type=int, default=0)
+    parser.add_argument("--monsters", default="R",
+                        help="monster letters, e.g. RRBG for two red, one blue, one green")
+    parser.add_argument("--min-exit-distance", type=int)
+    parser.add_argument("--min-monster-distance", type=int, default=SIGHT_RADIUS)
+    parser.add_argument("--binary", action="store_true", help="write the binary level format")
+    parser.add_argument("--pure-python", action="store_true", help="do not use NumPy")
+    args = parser.parse_args(argv)
+
+    colors = {"R": "red", "B": "blue", "G": "green"}
+    start = time.perf_counter()
+    level = generate(
+        args.width, args.height or args.width, seed=args.seed, braid=args.braid,
+        fake_exits=args.fake_exits, monsters=[colors[c] for c in args.monsters.upper()],
+        min_exit_distance=args.min_exit_distance,
+        min_monster_distance=args.min_monster_distance,
+        use_numpy=False if args.pure_python else None,
+    )
+    generated = time.perf_counter()
+    (write_binary if args.binary else write_json)(level, args.out)
+    print(f"{level.width}x{level.height} maze: generated in {generated - start:.2f}s, "
+          f"written in {time.perf_counter() - generated:.2f}s -> {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,190 @@
+import math
+from settings import *
+from tiles import WALL
+from monster import Monster
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COLOR_CODES = {"red": 0, "blue": 1, "green": 2}
+
+# ---------------- STRUCTURE OF ARRAYS ----------------
+class MonsterHorde:
+    # Every monster of a level stored column-wise in NumPy arrays and
+    # stepped together. The rules are those of Monster.update/try_move:
+    # blue freezes while looked at, green moves only while looked at, a
+    # monster inside the flow field (or seeing the player within 3 tiles)
+    # chases, the others walk to a wander target that is dropped when they
+    # get stuck. Only line of sight, flow-field lookups and new wander
+    # targets stay per-monster calls, and only for the monsters that need
+    # them, in index order so the random stream matches the scalar code.
+    def __init__(self, monsters_info, rng):
+        n = len(monsters_info)
+        self.rng = rng
+        self.colors = [color for color, _ in monsters_info]
+        self.color = np.array([COLOR_CODES[c] for c in self.colors], dtype=np.int8)
+        self.x = np.array([pos[0] for _, pos in monsters_info], dtype=np.float64)
+        self.y = np.array([pos[1] for _, pos in monsters_info], dtype=np.float64)
+        self.angle = np.zeros(n)
+        self.target_x = np.full(n, np.nan)  # nan: no target
+        self.target_y = np.full(n, np.nan)
+        self.sees_player = np.zeros(n, dtype=bool)
+        self.reach_thresh = 0.3
+        self.views = [MonsterView(self, i) for i in range(n)]
+
+    def __len__(self):
+        return len(self.colors)
+
+    def _walls(self, maze, x, y):
+        # wall test for arrays of points, same truncation as Maze.is_wall
+        index = (y.astype(np.int64) + 1) * maze.stride + x.astype(np.int64) + 1
+        if maze.chunked:
+            cells = maze.cells
+            return np.array([cells[i] == WALL for i in index.tolist()], dtype=bool)
+        return np.frombuffer(maze.cells, dtype=np.uint8)[index] == WALL
+
+    def update(self, player, maze, flow=None, dt=SIM_DT):
+        speed = MONSTER_SPEED * dt
+        px, py = player.x, player.y
+
+        # looking gate, as computed by Simulation.step
+        to_monster = np.arctan2(self.y - py, self.x - px)
+        diff = (to_monster - player.angle + math.pi) % math.tau - math.pi
+        looking = np.abs(diff) < FOV / 6
+
+        dx = px - self.x
+        dy = py - self.y
+        dist = np.hypot(dx, dy)
+
+        # line of sight only for monsters close enough for it to succeed
+        sees = self.sees_player
+        sees[:] = False
+        for i in np.flatnonzero(dist <= maze.visibility.radius + 1e-9).tolist():
+            sees[i] = maze.visibility.can_see(self.x[i], self.y[i], px, py)
+
+        frozen = ((self.color == 1) & looking) | ((self.color == 2) & ~looking)
+        active = ~frozen
+        chase = active & sees & (dist <= 3)
+
+        # monsters inside the field head for its next tile, or straight at
+        # the player on or next to the player's tile; a tile within radius
+        # steps is never more than radius + 2 away, so the rest are skipped
+        chase_dx = dx.copy()
+        chase_dy = dy.copy()
+        if flow is not None:
+            for i in np.flatnonzero(active & (dist <= flow.radius + 2)).tolist():
+                steps = flow.distance(self.x[i], self.y[i])
+                if steps < 0:
+                    continue
+                chase[i] = True
+                if steps > 1:
+                    step = flow.next_step(self.x[i], self.y[i])
+                    chase_dx[i] = step[0] - self.x[i]
+                    chase_dy[i] = step[1] - self.y[i]
+        wander = active & ~chase
+
+        # wanderers without a target, or at it, pick a new one
+        with np.errstate(invalid="ignore"):
+            reached = np.hypot(self.target_x - self.x, self.target_y - self.y) < self.reach_thresh
+        retarget = wander & (np.isnan(self.target_x) | reached)
+        for i in np.flatnonzero(retarget).tolist():
+            self.target_x[i], self.target_y[i] = maze.wander_target(self.rng, self.x[i], self.y[i])
+
+        self.angle = np.where(chase, np.arctan2(chase_dy, chase_dx), self.angle)
+        self.angle = np.where(wander, np.arctan2(self.target_y - self.y, self.target_x - self.x), self.angle)
+
+        # axis-separated collision, x first, as in try_move
+        old_x = self.x
+        old_y = self.y
+        step_x = np.where(active, np.cos(self.angle) * speed, 0.0)
+        step_y = np.where(active, np.sin(self.angle) * speed, 0.0)
+        nx = old_x + step_x
+        x = np.where(self._walls(maze, nx, old_y), old_x, nx)
+        ny = old_y + step_y
+        y = np.where(self._walls(maze, x, ny), old_y, ny)
+        self.x = x
+        self.y = y
+
+        # pinned against a wall on the way to a wander target: pick another
+        stuck = active & (np.hypot(x - old_x, y - old_y) < speed * 0.5)
+        self.target_x[stuck] = np.nan
+        self.target_y[stuck] = np.nan
+
+    def near(self, x, y, radius, kind=None):
+        # views of the monsters within radius, like SpatialHash.near
+        if kind not in (None, "monster"):
+            return []
+        inside = (self.x - x) ** 2 + (self.y - y) ** 2 <= radius * radius
+        return [self.views[i] for i in np.flatnonzero(inside).tolist()]
+
+    def cone(self, x, y, angle, half_angle, radius, kind=None, pad=0.0):
+        # views of the monsters in a view cone, like SpatialHash.cone
+        if kind not in (None, "monster"):
+            return []
+        dx = self.x - x
+        dy = self.y - y
+        d = np.hypot(dx, dy)
+        diff = np.abs((np.arctan2(dy, dx) - angle + math.pi) % math.tau - math.pi)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slack = np.arcsin(np.minimum(1.0, pad / d))
+        inside = (d <= radius) & ((d <= pad) | (diff <= half_angle + slack))
+        return [self.views[i] for i in np.flatnonzero(inside).tolist()]
+
+    def caught(self, player):
+        return bool((np.hypot(self.x - player.x, self.y - player.y) < CATCH_RADIUS).any())
+
+# ---------------- PER-MONSTER VIEW ----------------
+class MonsterView(Monster):
+    # One row of a MonsterHorde behaving like a Monster, for the renderer,
+    # the overlay and anything else that reads monsters one at a time.
+    def __init__(self, horde, i):
+        self.horde = horde
+        self.i = i
+        self.color = horde.colors[i]
+        self.rng = horde.rng
+        self.reach_thresh = horde.reach_thresh
+
+    @property
+    def x(self):
+        return float(self.horde.x[self.i])
+
+    @x.setter
+    def x(self, value):
+        self.horde.x[self.i] = value
+
+    @property
+    def y(self):
+        return float(self.horde.y[self.i])
+
+    @y.setter
+    def y(self, value):
+        self.horde.y[self.i] = value
+
+    @property
+    def angle(self):
+        return float(self.horde.angle[self.i])
+
+    @angle.setter
+    def angle(self, value):
+        self.horde.angle[self.i] = value
+
+    @property
+    def target(self):
+        tx = self.horde.target_x[self.i]
+        return None if math.isnan(tx) else (float(tx), float(self.horde.target_y[self.i]))
+
+    @target.setter
+    def target(self, value):
+        tx, ty = value if value is not None else (math.nan, math.nan)
+        self.horde.target_x[self.i] = tx
+        self.horde.target_y[self.i] = ty
+
+    @property
+    def sees_player(self):
+        return bool(self.horde.sees_player[self.i])
+
+    @sees_player.setter
+    def sees_player(self, value):
+        self.horde.sees_player[self.i] = value
\ No newline at end of file
@@ -0,0 +1,63 @@
+import os
+import threading
+from collections import OrderedDict
+from settings import *
+from maze import Maze
+
+class LevelCache:
+    # Parsed Maze templates keyed on (path, mtime) with LRU eviction.
+    # get() hands out cheap clones, so restarting a level never re-reads
+    # the file; prefetch() parses a level on a background thread while the
+    # current one is being played.
+    def __init__(self, capacity=LEVEL_CACHE_SIZE):
+        self.capacity = capacity
+        self.templates = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def _key(self, path):
+        return (os.path.abspath(path), os.path.getmtime(path))
+
+    def get(self, path):
+        key = self._key(path)
+        with self.lock:
+            loader = self.pending.get(key)
+        if loader:
+            loader.join()
+
+        with self.lock:
+            template = self.templates.get(key)
+            if template is not None:
+                self.templates.move_to_end(key)
+        if template is None:
+            template = self._store(key, Maze(path))
+        return template.clone()
+
+    def prefetch(self, path):
+        if not os.path.exists(path):
+            return
+        key = self._key(path)
+        with self.lock:
+            if key in self.templates or key in self.pending:
+                return
+            loader = threading.Thread(target=self._load, args=(key, path), daemon=True)
+            self.pending[key] = loader
+        loader.start()
+
+    def _load(self, key, path):
+        try:
+            self._store(key, Maze(path))
+        except (OSError, ValueError, KeyError, IndexError):
+            pass  # a broken file is reported when get() loads it for real
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+    def _store(self, key, template):
+        template.warm()
+        with self.lock:
+            self.templates[key] = template
+            self.templates.move_to_end(key)
+            while len(self.templates) > self.capacity:
+                self.templates.popitem(last=False)
+        return template
\ No newline at end of file
@@ -1,23 +1,38 @@
 import pygame
 import json
 import os
-import copy
+import sys
+from edit_history import EditHistory
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # ---------------- SETTINGS ----------------
 TILE_SIZE = 40
 GRID_WIDTH = 15
 GRID_HEIGHT = 10
 TOOL_WIDTH = 200
-SCREEN_WIDTH = TILE_SIZE * GRID_WIDTH + TOOL_WIDTH
-SCREEN_HEIGHT = TILE_SIZE * GRID_HEIGHT
+VIEW_WIDTH = 800
+SCREEN_WIDTH = VIEW_WIDTH + TOOL_WIDTH
+SCREEN_HEIGHT = 600
+HISTORY_MAX_BYTES = 8 * 1024 * 1024
+EDITOR_FPS = 60
+ZOOM_LEVELS = [2, 3, 4, 6, 8, 12, 16, 24, 32, 40, 56]
+OUTLINE_MIN_ZOOM = 12
 
 pygame.init()
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Level Editor")
 font = pygame.font.SysFont(None, 24)
+clock = pygame.time.Clock()
+VIEW_RECT = pygame.Rect(0, 0, VIEW_WIDTH, SCREEN_HEIGHT)
+TOOL_RECT = pygame.Rect(VIEW_WIDTH, 0, TOOL_WIDTH, SCREEN_HEIGHT)
 
 # ---------------- GRID ----------------
 grid = [["." for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+level_name = ""
 
 # Base tiles (toolbar)
 tiles = ["#", ".", "P", "E", "F", "C", "M"]
@@ -36,6 +51,10 @@ colors = {
 
 selected_tile = "#"
 
+# paint with the brush, drag out a rectangle, or flood fill a region
+tools = {pygame.K_b: "brush", pygame.K_r: "rect", pygame.K_f: "fill"}
+tool = "brush"
+
 # ---------------- MONSTER TYPES ----------------
 monster_types = ["red", "blue", "green"]
 monster_index = 0
@@ -47,16 +66,155 @@ def get_monster_letter():
         "green": "G"
     }[monster_types[monster_index]]
 
-# ---------------- UNDO / REDO ----------------
-undo_stack = []
-redo_stack = []
-
-def copy_grid():
-    return copy.deepcopy(grid)
+def current_tile(button):
+    if button == 3:
+        return "."
+    return get_monster_letter() if selected_tile == "M" else selected_tile
 
-# ---------------- SAVE SYSTEM ----------------
-saving = False
-save_text = ""
+# ---------------- UNDO / REDO ----------------
+# one entry per paint/erase drag or bulk fill, holding only the cells it
+# changed
+history = EditHistory(HISTORY_MAX_BYTES)
+
+# ---------------- VIEWPORT ----------------
+# cam_x, cam_y is the tile at the top-left corner of the view
+cam_x = cam_y = 0
+zoom = TILE_SIZE
+
+def fit_zoom():
+    # largest zoom level, up to TILE_SIZE, that shows the whole grid
+    fitting = [z for z in ZOOM_LEVELS
+               if z <= TILE_SIZE and z * GRID_WIDTH <= VIEW_WIDTH and z * GRID_HEIGHT <= SCREEN_HEIGHT]
+    return fitting[-1] if fitting else ZOOM_LEVELS[4]
+
+def clamp_camera():
+    global cam_x, cam_y
+    cam_x = max(0, min(cam_x, GRID_WIDTH - VIEW_WIDTH // zoom))
+    cam_y = max(0, min(cam_y, GRID_HEIGHT - SCREEN_HEIGHT // zoom))
+
+def set_zoom(level, px, py):
+    # zoom keeping the tile under (px, py) in place
+    global zoom, cam_x, cam_y
+    tx, ty = cam_x + px / zoom, cam_y + py / zoom
+    zoom = ZOOM_LEVELS[max(0, min(len(ZOOM_LEVELS) - 1, level))]
+    cam_x = int(tx - px / zoom)
+    cam_y = int(ty - py / zoom)
+    clamp_camera()
+
+def cell_at(mx, my):
+    if not VIEW_RECT.collidepoint(mx, my):
+        return None
+    gx, gy = cam_x + mx // zoom, cam_y + my // zoom
+    if gx < GRID_WIDTH and gy < GRID_HEIGHT:
+        return gx, gy
+    return None
+
+def cell_rect(x, y):
+    return pygame.Rect((x - cam_x) * zoom, (y - cam_y) * zoom, zoom, zoom)
+
+def visible_cells():
+    x1 = min(GRID_WIDTH, cam_x + VIEW_WIDTH // zoom + 1)
+    y1 = min(GRID_HEIGHT, cam_y + SCREEN_HEIGHT // zoom + 1)
+    return cam_x, cam_y, x1, y1
+
+# ---------------- BULK TOOLS ----------------
+def rect_cells(a, b):
+    (ax, ay), (bx, by) = a, b
+    for y in range(min(ay, by), max(ay, by) + 1):
+        for x in range(min(ax, bx), max(ax, bx) + 1):
+            yield x, y
+
+def flood_cells(x, y):
+    # every cell 4-connected to (x, y) holding the same tile
+    if np is not None:
+        return _flood_np(x, y)
+
+    stride = GRID_WIDTH + 2
+    codes = bytearray(stride * (GRID_HEIGHT + 2))  # zero border
+    for gy, row in enumerate(grid):
+        start = (gy + 1) * stride + 1
+        codes[start:start + GRID_WIDTH] = "".join(row).encode("ascii")
+
+    target = ord(grid[y][x])
+    seen = bytearray(len(codes))
+    first = (y + 1) * stride + x + 1
+    seen[first] = 1
+    stack = [first]
+    cells = []
+    while stack:
+        i = stack.pop()
+        cells.append((i % stride - 1, i // stride - 1))
+        for n in (i + 1, i - 1, i + stride, i - stride):
+            if codes[n] == target and not seen[n]:
+                seen[n] = 1
+                stack.append(n)
+    return cells
+
+def _flood_np(x, y):
+    # Labels horizontal runs of the target tile, links runs that touch
+    # vertically and merges the links by repeated min-hooking and pointer
+    # jumping, so the work is array passes rather than a per-cell search.
+    codes = np.frombuffer("".join("".join(row) for row in grid).encode("ascii"), dtype=np.uint8)
+    mask = codes.reshape(GRID_HEIGHT, GRID_WIDTH) == ord(grid[y][x])
+
+    starts = mask.copy()
+    starts[:, 1:] &= ~mask[:, :-1]
+    run = np.cumsum(starts.ravel()).reshape(mask.shape) - 1
+    touching = mask[:-1] & mask[1:]
+    a = run[:-1][touching]
+    b = run[1:][touching]
+
+    labels = np.arange(int(starts.sum()))
+    while True:
+        la = labels[a]
+        lb = labels[b]
+        differ = la != lb
+        if not differ.any():
+            break
+        np.minimum.at(labels, np.maximum(la, lb)[differ], np.minimum(la, lb)[differ])
+        while True:
+            jumped = labels[labels]
+            if (jumped == labels).all():
+                break
+            labels = jumped
+
+    ys, xs = np.nonzero(mask & (labels[run] == labels[run[y, x]]))
+    return list(zip(xs.tolist(), ys.tolist()))
+
+# ---------------- LOAD / SAVE ----------------
+prompt = None  # "save" or "open" while typing a file name
+prompt_text = ""
+
+def new_level(width, height):
+    global grid, GRID_WIDTH, GRID_HEIGHT, cam_x, cam_y, zoom, level_name
+    grid = [["." for _ in range(width)] for _ in range(height)]
+    GRID_WIDTH, GRID_HEIGHT = width, height
+    level_name = ""
+    cam_x = cam_y = 0
+    zoom = fit_zoom()
+    history.clear()
+
+def load_level(path):
+    global grid, GRID_WIDTH, GRID_HEIGHT, cam_x, cam_y, zoom, level_name
+    if not os.path.exists(path):
+        path = os.path.join("levels", path)
+    if not os.path.exists(path) and not path.endswith(".json"):
+        path += ".json"
+    if not os.path.exists(path):
+        print("No such level:", path)
+        return
+
+    # JSON and binary levels both go through the game's loader
+    from maze import Maze
+    from convert_level import level_rows
+    maze = Maze(path, chunked=False)
+    grid = level_rows(maze)
+    GRID_WIDTH, GRID_HEIGHT = maze.width, maze.height
+    level_name = os.path.splitext(os.path.basename(path))[0]
+    cam_x = cam_y = 0
+    zoom = fit_zoom()
+    history.clear()
+    print("Opened", path)
 
 def save_level(name):
     if not name.endswith(".json"):
@@ -73,131 +231,293 @@ def save_level(name):
     print("Saved to", path)
 
 # ---------------- DRAW ----------------
-def draw():
-    screen.fill((50, 50, 50))
-
-    # Draw grid
-    for y in range(GRID_HEIGHT):
-        for x in range(GRID_WIDTH):
-            rect = pygame.Rect(x*TILE_SIZE, y*TILE_SIZE, TILE_SIZE, TILE_SIZE)
-            tile = grid[y][x]
-            color = colors.get(tile, (30, 30, 30))
-            pygame.draw.rect(screen, color, rect)
-            pygame.draw.rect(screen, (0,0,0), rect, 1)
-
-    # Toolbar
+_glyphs = {}
+
+def glyph(text, color=(255, 255, 255)):
+    # toolbar labels are rendered once and reused
+    key = (text, color)
+    if key not in _glyphs:
+        _glyphs[key] = font.render(text, True, color)
+    return _glyphs[key]
+
+if np is not None:
+    COLOR_LUT = np.zeros((256, 3), dtype=np.uint8)
+    COLOR_LUT[:] = colors["."]
+    for t, c in colors.items():
+        COLOR_LUT[ord(t)] = c
+
+def draw_cell(x, y):
+    # partial cells at the viewport edge must not spill into the toolbar
+    rect = cell_rect(x, y)
+    visible = rect.clip(VIEW_RECT)
+    if not visible:
+        return visible
+    clip = screen.get_clip()
+    screen.set_clip(visible)
+    screen.fill(colors.get(grid[y][x], (30, 30, 30)), rect)
+    if zoom >= OUTLINE_MIN_ZOOM:
+        pygame.draw.rect(screen, (0,0,0), rect, 1)
+    screen.set_clip(clip)
+    return visible
+
+def draw_view():
+    # only the cells inside the viewport are drawn
+    screen.set_clip(VIEW_RECT)
+    screen.fill((50, 50, 50), VIEW_RECT)
+    x0, y0, x1, y1 = visible_cells()
+
+    if np is not None:
+        # one pixel per tile through the colour table, scaled up in one go
+        codes = "".join("".join(grid[y][x0:x1]) for y in range(y0, y1)).encode("ascii")
+        rgb = COLOR_LUT[np.frombuffer(codes, dtype=np.uint8).reshape(y1 - y0, x1 - x0)]
+        small = pygame.surfarray.make_surface(rgb.swapaxes(0, 1))
+        screen.blit(pygame.transform.scale(small, ((x1 - x0) * zoom, (y1 - y0) * zoom)), (0, 0))
+        if zoom >= OUTLINE_MIN_ZOOM:
+            bottom = (y1 - y0) * zoom
+            right = (x1 - x0) * zoom
+            for i in range(x1 - x0 + 1):
+                pygame.draw.line(screen, (0,0,0), (i * zoom, 0), (i * zoom, bottom))
+            for i in range(y1 - y0 + 1):
+                pygame.draw.line(screen, (0,0,0), (0, i * zoom), (right, i * zoom))
+    else:
+        for y in range(y0, y1):
+            for x in range(x0, x1):
+                draw_cell(x, y)
+
+    if rect_start and rect_end:
+        (ax, ay), (bx, by) = rect_start, rect_end
+        r = cell_rect(min(ax, bx), min(ay, by))
+        r.width = (abs(ax - bx) + 1) * zoom
+        r.height = (abs(ay - by) + 1) * zoom
+        pygame.draw.rect(screen, (255, 255, 0), r, 2)
+
+    # Save / open input box
+    if prompt:
+        pygame.draw.rect(screen, (0,0,0), (100, SCREEN_HEIGHT//2-20, 400, 40))
+        pygame.draw.rect(screen, (255,255,255), (100, SCREEN_HEIGHT//2-20, 400, 40), 2)
+        label = "Save as: " if prompt == "save" else "Open: "
+        txt = font.render(label + prompt_text, True, (255,255,255))
+        screen.blit(txt, (110, SCREEN_HEIGHT//2-10))
+    screen.set_clip(None)
+
+def draw_toolbar():
+    screen.fill((50, 50, 50), TOOL_RECT)
+
     for i, t in enumerate(tiles):
-        rect = pygame.Rect(GRID_WIDTH*TILE_SIZE, i*TILE_SIZE, TILE_SIZE, TILE_SIZE)
+        rect = pygame.Rect(VIEW_WIDTH, i*TILE_SIZE, TILE_SIZE, TILE_SIZE)
         pygame.draw.rect(screen, (120,120,120), rect)
 
         if t == selected_tile:
             pygame.draw.rect(screen, (255,255,0), rect, 3)
 
-        text = font.render(t, True, (255,255,255))
-        screen.blit(text, (GRID_WIDTH*TILE_SIZE + 5, i*TILE_SIZE + 5))
-
-    # Monster selector info
-    m_text = font.render(f"Monster Type: {monster_types[monster_index]}", True, (255,255,255))
-    screen.blit(m_text, (GRID_WIDTH*TILE_SIZE + 5, 300))
+        screen.blit(glyph(t), (VIEW_WIDTH + 5, i*TILE_SIZE + 5))
 
-    hint1 = font.render("TAB = Change Monster", True, (200,200,200))
-    hint2 = font.render("S = Save", True, (200,200,200))
-    screen.blit(hint1, (GRID_WIDTH*TILE_SIZE + 5, 330))
-    screen.blit(hint2, (GRID_WIDTH*TILE_SIZE + 5, 350))
+    # Monster selector and tool info
+    screen.blit(glyph(f"Monster Type: {monster_types[monster_index]}"), (VIEW_WIDTH + 5, 300))
+    screen.blit(glyph(f"Tool: {tool}"), (VIEW_WIDTH + 5, 320))
+    screen.blit(glyph(f"{GRID_WIDTH}x{GRID_HEIGHT}  zoom {zoom}"), (VIEW_WIDTH + 5, 340))
 
-    # Save input box
-    if saving:
-        pygame.draw.rect(screen, (0,0,0), (100, SCREEN_HEIGHT//2-20, 400, 40))
-        pygame.draw.rect(screen, (255,255,255), (100, SCREEN_HEIGHT//2-20, 400, 40), 2)
-        txt = font.render("Save as: " + save_text, True, (255,255,255))
-        screen.blit(txt, (110, SCREEN_HEIGHT//2-10))
+    hints = [
+        "TAB = Change Monster",
+        "B / R / F = Brush, Rect, Fill",
+        "Arrows / Middle = Scroll",
+        "Wheel / + - = Zoom",
+        "S = Save   O = Open",
+    ]
+    for i, hint in enumerate(hints):
+        screen.blit(glyph(hint, (200,200,200)), (VIEW_WIDTH + 5, 370 + i * 20))
 
 # ---------------- MAIN LOOP ----------------
+if len(sys.argv) > 1:
+    # python level_edit.py LEVEL  or  python level_edit.py WIDTHxHEIGHT
+    arg = sys.argv[1]
+    if "x" in arg and arg.replace("x", "").isdigit():
+        new_level(*map(int, arg.split("x")))
+    else:
+        load_level(arg)
+else:
+    zoom = fit_zoom()
+
 running = True
 painting = False
 erasing = False
+panning = False
+rect_start = rect_end = None
+rect_button = 0
 
-while running:
-    draw()
-    pygame.display.flip()
+redraw_view = redraw_tools = True
+dirty = []
 
-    for e in pygame.event.get():
+while running:
+    # ---------------- REDRAW ----------------
+    if redraw_view or redraw_tools:
+        if redraw_view:
+            draw_view()
+        if redraw_tools:
+            draw_toolbar()
+        pygame.display.flip()
+        redraw_view = redraw_tools = False
+        dirty.clear()
+    elif dirty:
+        pygame.display.update(dirty)
+        dirty.clear()
+
+    # sleep until something happens, then take everything queued
+    events = [pygame.event.wait()] + pygame.event.get()
+
+    for e in events:
 
         if e.type == pygame.QUIT:
             running = False
 
+        if e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            redraw_view = redraw_tools = True
+
         # ---------------- KEYBOARD ----------------
         if e.type == pygame.KEYDOWN:
 
-            if saving:
+            if prompt:
                 if e.key == pygame.K_RETURN:
-                    save_level(save_text)
-                    save_text = ""
-                    saving = False
+                    if prompt == "save":
+                        save_level(prompt_text)
+                        level_name = prompt_text
+                    else:
+                        load_level(prompt_text)
+                        redraw_tools = True
+                    prompt_text = ""
+                    prompt = None
+                elif e.key == pygame.K_ESCAPE:
+                    prompt_text = ""
+                    prompt = None
                 elif e.key == pygame.K_BACKSPACE:
-                    save_text = save_text[:-1]
+                    prompt_text = prompt_text[:-1]
                 else:
-                    save_text += e.unicode
+                    prompt_text += e.unicode
+                redraw_view = True
                 continue
 
             if e.mod & pygame.KMOD_CTRL:
-                if e.key == pygame.K_z and undo_stack:
-                    redo_stack.append(copy_grid())
-                    grid[:] = undo_stack.pop()
-                if e.key == pygame.K_y and redo_stack:
-                    undo_stack.append(copy_grid())
-                    grid[:] = redo_stack.pop()
+                if e.key in (pygame.K_z, pygame.K_y):
+                    stroke = history.undo(grid) if e.key == pygame.K_z else history.redo(grid)
+                    # small strokes repaint their own cells, big ones the view
+                    if stroke is not None and len(stroke) <= 4096:
+                        x0, y0, x1, y1 = visible_cells()
+                        for x, y in zip(stroke.xs, stroke.ys):
+                            if x0 <= x < x1 and y0 <= y < y1:
+                                dirty.append(draw_cell(x, y))
+                    elif stroke is not None:
+                        redraw_view = True
+                continue
 
             if e.key == pygame.K_s:
-                saving = True
+                prompt = "save"
+                prompt_text = level_name
+                redraw_view = True
+
+            if e.key == pygame.K_o:
+                prompt = "open"
+                redraw_view = True
 
             if e.key == pygame.K_TAB:
                 monster_index = (monster_index + 1) % len(monster_types)
+                redraw_tools = True
+
+            if e.key in tools:
+                tool = tools[e.key]
+                redraw_tools = True
+
+            step = max(1, VIEW_WIDTH // zoom // 4)
+            moves = {pygame.K_LEFT: (-step, 0), pygame.K_RIGHT: (step, 0),
+                     pygame.K_UP: (0, -step), pygame.K_DOWN: (0, step)}
+            if e.key in moves:
+                cam_x += moves[e.key][0]
+                cam_y += moves[e.key][1]
+                clamp_camera()
+                redraw_view = True
+
+            if e.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS, pygame.K_MINUS, pygame.K_KP_MINUS):
+                delta = -1 if e.key in (pygame.K_MINUS, pygame.K_KP_MINUS) else 1
+                set_zoom(ZOOM_LEVELS.index(zoom) + delta, VIEW_WIDTH // 2, SCREEN_HEIGHT // 2)
+                redraw_view = redraw_tools = True
+
+        if e.type == pygame.MOUSEWHEEL:
+            mx, my = pygame.mouse.get_pos()
+            if VIEW_RECT.collidepoint(mx, my):
+                set_zoom(ZOOM_LEVELS.index(zoom) + (1 if e.y > 0 else -1), mx, my)
+                redraw_view = redraw_tools = True
 
         # ---------------- MOUSE ----------------
         if e.type == pygame.MOUSEBUTTONDOWN:
             mx, my = e.pos
+            cell = cell_at(mx, my)
 
-            if mx < GRID_WIDTH*TILE_SIZE and my < GRID_HEIGHT*TILE_SIZE:
-                undo_stack.append(copy_grid())
-                redo_stack.clear()
+            if e.button == 2 and VIEW_RECT.collidepoint(mx, my):
+                panning = True
+                pan_x = pan_y = 0
 
-                gx, gy = mx // TILE_SIZE, my // TILE_SIZE
-
-                if e.button == 1:
-                    if selected_tile == "M":
-                        grid[gy][gx] = get_monster_letter()
+            elif cell and e.button in (1, 3):
+                if tool == "brush":
+                    history.begin_stroke()
+                    if e.button == 1:
+                        painting = True
                     else:
-                        grid[gy][gx] = selected_tile
-                    painting = True
-
-                if e.button == 3:
-                    grid[gy][gx] = "."
-                    erasing = True
-
-            elif mx >= GRID_WIDTH*TILE_SIZE:
+                        erasing = True
+                    history.set(grid, *cell, current_tile(e.button))
+                    dirty.append(draw_cell(*cell))
+                elif tool == "rect":
+                    rect_start = rect_end = cell
+                    rect_button = e.button
+                    redraw_view = True
+                elif tool == "fill":
+                    if history.fill(grid, flood_cells(*cell), current_tile(e.button)):
+                        redraw_view = True
+
+            elif TOOL_RECT.collidepoint(mx, my) and e.button == 1:
                 index = my // TILE_SIZE
                 if index < len(tiles):
                     selected_tile = tiles[index]
+                    redraw_tools = True
 
         if e.type == pygame.MOUSEBUTTONUP:
             if e.button == 1:
                 painting = False
             if e.button == 3:
                 erasing = False
+            if e.button == 2:
+                panning = False
+            if not painting and not erasing:
+                history.end_stroke()
+
+            if rect_start and e.button == rect_button:
+                history.fill(grid, rect_cells(rect_start, rect_end), current_tile(rect_button))
+                rect_start = rect_end = None
+                redraw_view = True
 
         if e.type == pygame.MOUSEMOTION:
             mx, my = e.pos
-            if mx < GRID_WIDTH*TILE_SIZE and my < GRID_HEIGHT*TILE_SIZE:
-                gx, gy = mx // TILE_SIZE, my // TILE_SIZE
-
-                if painting:
-                    if selected_tile == "M":
-                        grid[gy][gx] = get_monster_letter()
-                    else:
-                        grid[gy][gx] = selected_tile
 
-                if erasing:
-                    grid[gy][gx] = "."
+            if panning:
+                # whole tiles only; the remainder carries over
+                pan_x -= e.rel[0]
+                pan_y -= e.rel[1]
+                if abs(pan_x) >= zoom or abs(pan_y) >= zoom:
+                    cam_x += int(pan_x / zoom)
+                    cam_y += int(pan_y / zoom)
+                    pan_x -= int(pan_x / zoom) * zoom
+                    pan_y -= int(pan_y / zoom) * zoom
+                    clamp_camera()
+                    redraw_view = True
+
+            cell = cell_at(mx, my)
+            if cell:
+                if rect_start and cell != rect_end:
+                    rect_end = cell
+                    redraw_view = True
+
+                if painting or erasing:
+                    history.set(grid, *cell, current_tile(3 if erasing else 1))
+                    dirty.append(draw_cell(*cell))
+
+    clock.tick(EDITOR_FPS)
 
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,100 @@
+import struct
+from collections import namedtuple
+from tiles import *
+
+# Binary level layout (little endian):
+#   header    "MZLV", version u8, 3 pad bytes, width u32, height u32,
+#             monster count u32, fake exit count u32
+#   entities  player x, y / exit x, y / compass x, y as i32 (-1 = none)
+#   monsters  count * (color letter u8, x i32, y i32)
+#   fakes     count * (x i32, y i32)
+#   tiles     (height + 2) * (width + 2) tile codes, row-major with a
+#             one-tile wall border: the exact layout of Maze.cells
+MAGIC = b"MZLV"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xIIII")
+ENTITIES = struct.Struct("<iiiiii")
+MONSTER = struct.Struct("<Bii")
+POINT = struct.Struct("<ii")
+
+MONSTER_LETTERS = {"red": "R", "blue": "B", "green": "G"}
+MONSTER_COLORS = {v: k for k, v in MONSTER_LETTERS.items()}
+
+LevelHeader = namedtuple(
+    "LevelHeader", "width height player exit compass monsters fake_exits tiles_offset"
+)
+
+def write_level(path, width, height, rows, player=None, exit=None, compass=None,
+                monsters=(), fake_exits=()):
+    # rows is any iterable of byte strings (or str), one per map row,
+    # streamed straight to disk. Monster letters in rows become floor;
+    # their positions belong in monsters as (color, x, y).
+    player = player or (-1, -1)
+    exit = exit or (-1, -1)
+    compass = compass or (-1, -1)
+    monsters = list(monsters)
+    fake_exits = list(fake_exits)
+    stride = width + 2
+    border = bytes([WALL]) * stride
+    clear = bytes.maketrans(b"RBG", b"...")
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, width, height, len(monsters), len(fake_exits)))
+        f.write(ENTITIES.pack(*player, *exit, *compass))
+        for color, x, y in monsters:
+            f.write(MONSTER.pack(ord(MONSTER_LETTERS[color]), x, y))
+        for x, y in fake_exits:
+            f.write(POINT.pack(x, y))
+
+        f.write(border)
+        written = 0
+        for row in rows:
+            if isinstance(row, str):
+                row = row.encode("ascii")
+            row = row[:width].translate(clear).ljust(width, b"#")
+            f.write(b"#" + row + b"#")
+            written += 1
+        for _ in range(height - written):
+            f.write(border)
+        f.write(border)
+
+def read_header(buf):
+    # Parses the header and entity tables of a binary level held in any
+    # buffer (bytes, mmap). Positions are tile coordinates; missing
+    # entities are None.
+    if len(buf) < HEADER.size:
+        raise ValueError("truncated header")
+    magic, version, width, height, monster_count, fake_count = HEADER.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("not a binary level file")
+    if version != VERSION:
+        raise ValueError(f"unsupported binary level version {version}")
+
+    tables = ENTITIES.size + monster_count * MONSTER.size + fake_count * POINT.size
+    if len(buf) < HEADER.size + tables + (width + 2) * (height + 2):
+        raise ValueError("binary level file is truncated")
+
+    offset = HEADER.size
+    px, py, ex, ey, cx, cy = ENTITIES.unpack_from(buf, offset)
+    offset += ENTITIES.size
+
+    monsters = []
+    for _ in range(monster_count):
+        letter, x, y = MONSTER.unpack_from(buf, offset)
+        monsters.append((MONSTER_COLORS[chr(letter)], x, y))
+        offset += MONSTER.size
+
+    fake_exits = []
+    for _ in range(fake_count):
+        fake_exits.append(POINT.unpack_from(buf, offset))
+        offset += POINT.size
+
+    def point(x, y):
+        return (x, y) if x >= 0 else None
+
+    return LevelHeader(width, height, point(px, py), point(ex, ey), point(cx, cy),
+                       monsters, fake_exits, offset)
+
+def is_binary_level(path):
+    with open(path, "rb") as f:
+        return f.read(4) == MAGIC
\ No newline at end of file
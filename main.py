@@ -1,21 +1,26 @@
+import time
+STARTUP = time.perf_counter()
+
 import pygame
 import math
 import sys
 import os
-from PyQt5.QtWidgets import QApplication, QFileDialog
 
 from settings import *
-from maze import Maze
-from player import Player
-from monster import Monster
-from raycast import render
-from ui import overlay, game_over_screen, win_screen
-
-pygame.init()
-pygame.display.set_caption("Maze Game")
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-clock = pygame.time.Clock()
+from simulation import Simulation, TickInput
+from level_cache import LevelCache
+from replay import ReplayWriter, new_replay_path
+from raycast import render, MONSTER_RGB
+from resolution import DynamicResolution
+from minimap import Minimap
+from ui import overlay, game_over_screen, win_screen, draw_profiler_hud, text_surface, clear_surface_cache
+from profiler import PROFILER
+from file_browser import browse
+
+screen = None
+clock = None
 fullscreen = False
+show_minimap = MINIMAP
 
 # ---------------- FULLSCREEN ----------------
 def toggle_fullscreen():
@@ -25,9 +30,18 @@ def toggle_fullscreen():
         screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
     else:
         screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clear_surface_cache()
 
 # ---------------- FILE PICKER ----------------
 def load_custom_level_pyqt():
+    # Qt is only imported here, the first time the dialog is opened; it
+    # dominates start-up time otherwise. Without Qt, a pygame browser is
+    # used instead.
+    try:
+        from PyQt5.QtWidgets import QApplication, QFileDialog
+    except ImportError:
+        return browse(screen, "levels")
+
     app = QApplication.instance()
     if not app:
         app = QApplication([])
@@ -38,83 +52,131 @@ def load_custom_level_pyqt():
         None,
         "Select Level File",
         "levels",
-        "JSON Files (*.json)",
+        "Level Files (*.json *.mzl);;JSON Levels (*.json);;Binary Levels (*.mzl)",
         options=options
     )
     return file_path or None
 
 # ---------------- RUN LEVEL ----------------
+levels = LevelCache()
+
+def numbered_level_path(level_num):
+    for ext in (".json", ".mzl"):
+        path = f"levels/level{level_num}{ext}"
+        if os.path.exists(path):
+            return path
+    return None
+
 def run_level(level_num=None, custom_path=None):
-    if custom_path:
-        level_path = custom_path
-    else:
-        level_path = f"levels/level{level_num}.json"
-        if not os.path.exists(level_path):
+    # Restarts and next-level transitions loop here instead of recursing;
+    # the next numbered level is parsed in the background meanwhile.
+    while True:
+        level_path = custom_path or numbered_level_path(level_num)
+        if not level_path:
             return
+        next_path = numbered_level_path(level_num + 1) if not custom_path else None
+        if next_path:
+            levels.prefetch(next_path)
 
-    maze = Maze(level_path)
-    player = Player(maze.player_start)
+        outcome = play_level(level_path, has_next=next_path is not None)
+        if outcome == "next":
+            level_num += 1
+        elif outcome != "restart":
+            return
 
-    # spawn all monsters
-    monsters = [Monster(color, pos) for color, pos in maze.monsters_info]
+def play_level(level_path, has_next=False):
+    # Plays one attempt; returns "menu", "restart" or "next".
+    global show_minimap
+    sim = Simulation(levels.get(level_path))
+    maze, player, monsters = sim.maze, sim.player, sim.monsters
+    recorder = ReplayWriter(new_replay_path(level_path), level_path, sim.seed) if RECORD_REPLAYS else None
 
     pygame.mouse.set_visible(False)
     pygame.event.set_grab(True)
     pygame.mouse.get_rel()
 
+    accumulator = 0.0
+    turn = 0
+    resolution = DynamicResolution()
+    minimap = Minimap(maze)
+    if PROFILER.enabled:
+        # every level is a fresh maze, so the counting hook goes on again
+        PROFILER.watch_calls(maze, "is_wall", "Maze.is_wall")
+
     while True:
         dt = clock.tick(FPS) / 1000
+        frame_start = time.perf_counter()
+        PROFILER.end_frame(dt)
+        with PROFILER.stage("input"):
+            for e in pygame.event.get():
+                if e.type == pygame.QUIT:
+                    if recorder:
+                        recorder.close(sim)
+                    pygame.quit()
+                    sys.exit()
+                if e.type == pygame.KEYDOWN:
+                    if e.key == pygame.K_ESCAPE:
+                        if recorder:
+                            recorder.close(sim)
+                        pygame.mouse.set_visible(True)
+                        pygame.event.set_grab(False)
+                        return "menu"
+                    if e.key == pygame.K_F11:
+                        toggle_fullscreen()
+                    if e.key == pygame.K_m:
+                        show_minimap = not show_minimap
+                    if e.key == pygame.K_F3:
+                        PROFILER.toggle()
+                        if PROFILER.enabled:
+                            PROFILER.watch_calls(maze, "is_wall", "Maze.is_wall")
+                        else:
+                            PROFILER.unwatch_calls(maze, "is_wall")
+                    if e.key == pygame.K_F4:
+                        path = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.json"
+                        print(f"wrote {PROFILER.dump(path)} trace events to {path}")
 
-        for e in pygame.event.get():
-            if e.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if e.type == pygame.KEYDOWN:
-                if e.key == pygame.K_ESCAPE:
-                    pygame.mouse.set_visible(True)
-                    pygame.event.set_grab(False)
-                    return
-                if e.key == pygame.K_F11:
-                    toggle_fullscreen()
-
-        mx, _ = pygame.mouse.get_rel()
-        player.angle += mx * 0.002
-
-        # movement
-        keys = pygame.key.get_pressed()
-        speed = PLAYER_WALK_SPEED
-        if keys[pygame.K_LSHIFT] and player.stamina > 0:
-            speed = PLAYER_RUN_SPEED
-            player.stamina -= STAMINA_DRAIN * dt
-        else:
-            player.stamina += STAMINA_REGEN * dt
-        player.stamina = max(0, min(STAMINA_MAX, player.stamina))
-
-        dx = math.cos(player.angle) * speed * dt
-        dy = math.sin(player.angle) * speed * dt
-        if keys[pygame.K_w]: player.move(dx, dy, maze)
-        if keys[pygame.K_s]: player.move(-dx, -dy, maze)
-        if keys[pygame.K_a]: player.move(dy, -dx, maze)
-        if keys[pygame.K_d]: player.move(-dy, dx, maze)
-
-        # monster logic
-        for monster in monsters:
-            angle_to_monster = math.atan2(monster.y - player.y, monster.x - player.x)
-            angle_diff = (angle_to_monster - player.angle + math.pi) % math.tau - math.pi
-            looking_at_monster = abs(angle_diff) < FOV / 6
-            monster.update(player, maze, looking_at_monster)
-
-        # render
-        screen.fill((15,15,15))
-        render(screen, player, maze, monsters)
+            # input -> fixed-rate simulation ticks
+            mx, _ = pygame.mouse.get_rel()
+            turn += mx
+            keys = pygame.key.get_pressed()
+
+        events = []
+        accumulator += min(dt, 0.25)
+        while accumulator >= SIM_DT and sim.status == "playing":
+            inp = TickInput(
+                keys[pygame.K_w], keys[pygame.K_s],
+                keys[pygame.K_a], keys[pygame.K_d],
+                keys[pygame.K_LSHIFT], turn
+            )
+            sim.step(inp)
+            if recorder:
+                recorder.record(inp)
+            events.extend(sim.events)
+            turn = 0
+            accumulator -= SIM_DT
+
+        # render, possibly at a reduced resolution, then stretch to the window
+        view = resolution.surface_for(screen)
+        view.fill((15,15,15))
+        seen = set()
+        depth_buffer = render(view, player, maze, sim.actors, resolution.scale, seen)
+        rays = len(depth_buffer)
+        with PROFILER.stage("scale"):
+            resolution.present(view, screen)
+
+        # the fog clears wherever this frame's rays went
+        with PROFILER.stage("minimap"):
+            minimap.reveal(seen)
+            if show_minimap:
+                minimap.draw(screen, player)
 
         # overlay if spotted
-        for monster in monsters:
-            if monster.can_see_player(player, maze):
-                overlay(screen, {"red":(255,0,0),"blue":(0,0,255),"green":(0,255,0)}[monster.color])
+        with PROFILER.stage("overlay"):
+            for monster in monsters:
+                if monster.sees_player:
+                    overlay(screen, MONSTER_RGB[monster.color])
 
         # compass
-        maze.check_compass_pickup(player.x, player.y)
         angle = maze.compass_angle(player.x, player.y)
         if angle is not None:
             cx, cy = screen.get_width()//2, screen.get_height()-40
@@ -125,60 +187,79 @@ def run_level(level_num=None, custom_path=None):
             pygame.draw.line(screen,(255,255,0),(cx,cy),(ax,ay),3)
 
         # fake exit
-        if maze.reached_fake_exit(player.x, player.y):
+        if "fake_exit" in events:
             overlay(screen,(120,0,120))
-            player.x, player.y = maze.player_start
+
+        if sim.status != "playing" and recorder:
+            recorder.close(sim)
 
         # caught
-        for monster in monsters:
-            if monster.caught_player(player):
-                pygame.mouse.set_visible(True)
-                pygame.event.set_grab(False)
-                choice = game_over_screen(screen)
-                if choice == "Restart":
-                    return run_level(level_num, custom_path)
-                elif choice == "Back to Menu":
-                    return
-                else:
-                    pygame.quit()
-                    sys.exit()
+        if sim.status == "caught":
+            pygame.mouse.set_visible(True)
+            pygame.event.set_grab(False)
+            choice = game_over_screen(screen)
+            if choice == "Restart":
+                return "restart"
+            elif choice == "Back to Menu":
+                return "menu"
+            else:
+                pygame.quit()
+                sys.exit()
 
         # real exit
-        if maze.reached_real_exit(player.x, player.y):
+        if sim.status == "won":
             pygame.mouse.set_visible(True)
             pygame.event.set_grab(False)
-            choice = win_screen(screen)
-            if choice == "Back to Menu":
-                return
+            choice = win_screen(screen, has_next)
+            if choice == "Next Level":
+                return "next"
+            elif choice == "Back to Menu":
+                return "menu"
             else:
                 pygame.quit()
                 sys.exit()
 
-        pygame.display.flip()
+        if PROFILER.enabled:
+            draw_profiler_hud(screen, PROFILER, rays, resolution.scale)
+
+        with PROFILER.stage("flip"):
+            pygame.display.flip()
+        resolution.update((time.perf_counter() - frame_start) * 1000)
 
 # ---------------- MENU ----------------
 def menu():
-    font = pygame.font.SysFont(None,48)
+    options = [
+        "1 - Level 1",
+        "2 - Level 2",
+        "3 - Level 3",
+        "L - Load Custom Level",
+        "ESC - Quit"
+    ]
+    first_frame = True
+    dirty = True
     while True:
-        screen.fill((0,0,0))
-        title = font.render("MAZE HORROR", True, (200,0,0))
-        screen.blit(title,(WIDTH//2-title.get_width()//2,120))
-
-        options = [
-            "1 - Level 1",
-            "2 - Level 2",
-            "3 - Level 3",
-            "L - Load Custom Level",
-            "ESC - Quit"
-        ]
-        for i,opt in enumerate(options):
-            text = font.render(opt, True, (255,255,255))
-            screen.blit(text,(WIDTH//2-250,220+i*50))
-        pygame.display.flip()
+        if dirty:
+            screen.fill((0,0,0))
+            title = text_surface("MAZE HORROR", 48, (200,0,0))
+            screen.blit(title,(WIDTH//2-title.get_width()//2,120))
+            for i,opt in enumerate(options):
+                screen.blit(text_surface(opt, 48, (255,255,255)),(WIDTH//2-250,220+i*50))
+            pygame.display.flip()
+            dirty = False
+
+        if first_frame:
+            first_frame = False
+            if os.environ.get("MAZE_STARTUP_PROBE"):
+                # read by startup_bench.py
+                print(f"first_frame {time.perf_counter() - STARTUP:.6f}", flush=True)
+                return
 
         for e in pygame.event.get():
             if e.type == pygame.QUIT: pygame.quit(); sys.exit()
+            if e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED): dirty = True
             if e.type == pygame.KEYDOWN:
+                # anything started from here draws over the menu
+                dirty = True
                 if e.key == pygame.K_1: run_level(1)
                 if e.key == pygame.K_2: run_level(2)
                 if e.key == pygame.K_3: run_level(3)
@@ -187,5 +268,19 @@ def menu():
                     if path: run_level(custom_path=path)
                 if e.key == pygame.K_ESCAPE: pygame.quit(); sys.exit()
 
+        clock.tick(MENU_FPS)
+
 # ---------------- START ----------------
-menu()
\ No newline at end of file
+def main():
+    global screen, clock
+    # only the subsystems the game uses; pygame.init() would also bring
+    # up audio and joysticks
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_caption("Maze Game")
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    clock = pygame.time.Clock()
+    menu()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
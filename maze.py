@@ -1,53 +1,214 @@
+import copy
 import json
 import math
+import mmap
+import re
+from settings import *
+from tiles import *
+from visibility import Visibility
+from levelfile import MONSTER_COLORS, is_binary_level, read_header
+from chunks import ChunkStore
+from spatial import SpatialHash
 
-class Maze:
-    def __init__(self, level_path):
-        with open(level_path, "r") as f:
-            data = json.load(f)
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-        self.map = [list(row) for row in data["map"]]
-        self.height = len(self.map)
-        self.width = len(self.map[0])
+MARKERS = re.compile(rb"[PRBGEFC]")
 
+class Maze:
+    def __init__(self, level_path, chunked=None):
         self.player_start = None
         self.monsters_info = []  # list of (color, position)
         self.exit = None
         self.fake_exits = []
         self.compass_pos = None
         self.compass_taken = False
+        self.chunked = False
+
+        if is_binary_level(level_path):
+            self._load_binary(level_path, chunked)
+        else:
+            self._load_json(level_path)
+
+        # static entities, stored as (kind, x, y, data); monsters move, so
+        # they live in the simulation's own index
+        self.entities = SpatialHash(ENTITY_CELL_SIZE)
+        if self.exit:
+            self.add_entity("exit", self.exit[0] + 0.5, self.exit[1] + 0.5)
+        for x, y in self.fake_exits:
+            self.add_entity("fake_exit", x + 0.5, y + 0.5)
+        if self.compass_pos:
+            self.add_entity("compass", *self.compass_pos)
+
+        # Everything derived from the (never modified) tiles is shared by
+        # clones: lazily built views go in _derived, so a view built
+        # through one clone is reused by the others.
+        self._derived = {}
+        self.visibility = Visibility(self)
+
+    def clone(self):
+        # A fresh copy for a new run of the level. The tile array, entity
+        # index and derived views are shared; only per-run state is reset.
+        maze = copy.copy(self)
+        maze.compass_taken = False
+        return maze
+
+    def warm(self):
+        # build the derived views ahead of time (used when prefetching)
+        if self.width * self.height <= WANDER_LIST_MAX_TILES:
+            self.free_tiles()
+        if np is not None and not self.chunked:
+            self.wall_grid()
+
+    def _load_json(self, level_path):
+        with open(level_path, "r") as f:
+            data = json.load(f)
+
+        rows = data["map"]
+        self.height = len(rows)
+        self.width = len(rows[0])
+
+        # Row-major tile codes with a one-tile wall border. Every open tile
+        # lies inside the border, so lookups need no bounds checks.
+        self.stride = self.width + 2
+        self.cells = bytearray([WALL]) * (self.stride * (self.height + 2))
+        for y, row in enumerate(rows):
+            row = row[:self.width].encode("ascii")
+            start = (y + 1) * self.stride + 1
+            self.cells[start:start + len(row)] = row
 
-        for y, row in enumerate(self.map):
-            for x, cell in enumerate(row):
-                pos = (x + 0.5, y + 0.5)
-
-                if cell == "P":
-                    self.player_start = pos
-                elif cell in ("R", "B", "G"):
-                    color = {"R": "red", "B": "blue", "G": "green"}[cell]
-                    self.monsters_info.append((color, pos))
-                    self.map[y][x] = "."  # clear tile
-                elif cell == "E":
-                    self.exit = (x, y)
-                elif cell == "F":
-                    self.fake_exits.append((x, y))
-                elif cell == "C":
-                    self.compass_pos = pos
-
-        # convert map back to strings
-        self.map = ["".join(row) for row in self.map]
+        for match in MARKERS.finditer(self.cells):
+            i = match.start()
+            x, y = i % self.stride - 1, i // self.stride - 1
+            pos = (x + 0.5, y + 0.5)
+            cell = match.group()
+
+            if cell == b"P":
+                self.player_start = pos
+            elif cell in (b"R", b"B", b"G"):
+                self.monsters_info.append((MONSTER_COLORS[cell.decode()], pos))
+                self.cells[i] = FLOOR  # clear tile
+            elif cell == b"E":
+                self.exit = (x, y)
+            elif cell == b"F":
+                self.fake_exits.append((x, y))
+            elif cell == b"C":
+                self.compass_pos = pos
+
+    def _load_binary(self, level_path, chunked):
+        # The tile array is used in place through mmap; only the entity
+        # tables in the header are parsed. Very large levels go through a
+        # ChunkStore that keeps a bounded set of tile chunks resident.
+        self._file = open(level_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = read_header(self._mmap)
+
+        self.width = header.width
+        self.height = header.height
+        self.stride = self.width + 2
+        if chunked is None:
+            chunked = self.width * self.height > CHUNKED_LEVEL_TILES
+        if chunked:
+            self.chunked = True
+            self.cells = ChunkStore(self._mmap, header.tiles_offset, self.stride, self.height + 2)
+        else:
+            size = self.stride * (self.height + 2)
+            self.cells = memoryview(self._mmap)[header.tiles_offset:header.tiles_offset + size]
+
+        if header.player:
+            self.player_start = (header.player[0] + 0.5, header.player[1] + 0.5)
+        self.exit = header.exit
+        if header.compass:
+            self.compass_pos = (header.compass[0] + 0.5, header.compass[1] + 0.5)
+        self.monsters_info = [(color, (x + 0.5, y + 0.5)) for color, x, y in header.monsters]
+        self.fake_exits = header.fake_exits
+
+    @property
+    def map(self):
+        # row strings without the border, decoded on first use
+        if "map" not in self._derived:
+            if self.chunked:
+                rows = self.cells.read_rect(1, 1, self.width, self.height)
+            else:
+                rows = [self.cells[(y + 1) * self.stride + 1:(y + 2) * self.stride - 1]
+                        for y in range(self.height)]
+            self._derived["map"] = [bytes(row).decode("ascii") for row in rows]
+        return self._derived["map"]
+
+    def index(self, x, y):
+        return (int(y) + 1) * self.stride + int(x) + 1
+
+    def tile_at(self, x, y):
+        return self.cells[(int(y) + 1) * self.stride + int(x) + 1]
 
     def is_wall(self, x, y):
-        xi, yi = int(x), int(y)
-        if xi < 0 or yi < 0 or xi >= self.width or yi >= self.height:
-            return True
-        return self.map[yi][xi] == "#"
+        return self.cells[(int(y) + 1) * self.stride + int(x) + 1] == WALL
+
+    def free_tiles(self):
+        # centers of every open tile, built once for monster wandering
+        if "free_tiles" not in self._derived:
+            self._derived["free_tiles"] = [
+                (x + 0.5, y + 0.5)
+                for y in range(self.height)
+                for x in range(self.width)
+                if not self.is_wall(x, y)
+            ]
+        return self._derived["free_tiles"]
+
+    def wander_target(self, rng, x, y):
+        # a random open tile center for a wandering monster at (x, y)
+        if self.width * self.height <= WANDER_LIST_MAX_TILES:
+            return rng.choice(self.free_tiles())
+        # huge levels sample nearby instead of listing every open tile,
+        # which also keeps chunked levels within resident chunks
+        for _ in range(100):
+            tx = int(x) + rng.randint(-WANDER_RADIUS, WANDER_RADIUS)
+            ty = int(y) + rng.randint(-WANDER_RADIUS, WANDER_RADIUS)
+            if 0 <= tx < self.width and 0 <= ty < self.height and not self.is_wall(tx, ty):
+                return (tx + 0.5, ty + 0.5)
+        return (int(x) + 0.5, int(y) + 0.5)
+
+    def add_entity(self, kind, x, y, data=None):
+        self.entities.insert((kind, x, y, data), kind, x, y)
+
+    def entities_near(self, x, y, radius, kind=None):
+        # static entities (kind, x, y, data) within radius of (x, y)
+        return self.entities.near(x, y, radius, kind)
+
+    def entities_in_view(self, x, y, angle, half_angle, radius, kind=None, pad=0.5):
+        # static entities within a view cone, counting each as a disc of
+        # radius pad so ones straddling the cone edge are included
+        return self.entities.cone(x, y, angle, half_angle, radius, kind, pad)
+
+    def wall_grid(self):
+        # padded boolean wall bitmap for the NumPy renderer
+        if "wall_grid" not in self._derived:
+            cells = np.frombuffer(self.cells, dtype=np.uint8)
+            self._derived["wall_grid"] = (cells == WALL).reshape(self.height + 2, self.stride)
+        return self._derived["wall_grid"]
+
+    def wall_window(self, x, y, radius):
+        # (grid, ox, oy): a padded wall bitmap covering every tile within
+        # radius of (x, y), where grid[gy, gx] is tile (gx + ox - 1, gy + oy - 1).
+        # Unchunked levels return the whole grid; chunked ones build a
+        # window with a wall border, so rays stop inside it.
+        if not self.chunked:
+            return self.wall_grid(), 0, 0
+        r = int(radius) + 2
+        ox, oy = int(x) - r, int(y) - r
+        size = 2 * r + 1
+        rows = self.cells.read_rect(ox + 1, oy + 1, size, size)
+        grid = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(size, size) == WALL
+        grid[0, :] = grid[-1, :] = grid[:, 0] = grid[:, -1] = True
+        return grid, ox + 1, oy + 1
 
     def reached_real_exit(self, x, y):
         return self.exit and int(x) == self.exit[0] and int(y) == self.exit[1]
 
     def reached_fake_exit(self, x, y):
-        return (int(x), int(y)) in self.fake_exits
+        return self.tile_at(x, y) == FAKE_EXIT
 
     def check_compass_pickup(self, x, y):
         if self.compass_pos and not self.compass_taken:
@@ -0,0 +1,135 @@
+import math
+from collections import OrderedDict
+import pygame
+from settings import *
+from tiles import WALL
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WALL_RGB = (110, 110, 110)
+FLOOR_RGB = (35, 35, 35)
+FOG_RGB = (0, 0, 0)
+
+# ---------------- MINIMAP ----------------
+class Minimap:
+    # The level is split into MINIMAP_TILE x MINIMAP_TILE blocks. Each
+    # block's wall layout is drawn once into a surface kept on the maze
+    # (shared by restarts of the level) and LRU-capped for huge levels.
+    # Per run, a second set of block surfaces starts as fog and gets
+    # individual cells copied in from the layout as the rays reveal them,
+    # so a frame costs the block blits and the markers.
+    def __init__(self, maze):
+        self.maze = maze
+        longest = max(maze.width, maze.height)
+        self.scale = max(MINIMAP_MIN_SCALE, min(MINIMAP_MAX_SCALE, MINIMAP_SIZE // longest))
+        self.block = MINIMAP_TILE * self.scale  # block size in pixels
+        self.layout = maze._derived.setdefault(("minimap", self.scale), OrderedDict())
+        self.explored = {}  # (bx, by) -> bytearray of MINIMAP_TILE ** 2 flags
+        self.fog = {}  # (bx, by) -> surface being revealed
+
+    # ---------- STATIC LAYOUT ----------
+    def _codes(self, x0, y0, w, h):
+        maze = self.maze
+        if maze.chunked:
+            return maze.cells.read_rect(x0 + 1, y0 + 1, w, h)
+        stride = maze.stride
+        return [bytes(maze.cells[(y + 1) * stride + x0 + 1:(y + 1) * stride + x0 + 1 + w])
+                for y in range(y0, y0 + h)]
+
+    def _layout_block(self, key):
+        surf = self.layout.get(key)
+        if surf is not None:
+            self.layout.move_to_end(key)
+            return surf
+
+        bx, by = key
+        x0, y0 = bx * MINIMAP_TILE, by * MINIMAP_TILE
+        w = min(MINIMAP_TILE, self.maze.width - x0)
+        h = min(MINIMAP_TILE, self.maze.height - y0)
+        rows = self._codes(x0, y0, w, h)
+        s = self.scale
+
+        if np is not None:
+            walls = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(h, w) == WALL
+            rgb = np.where(walls[..., None], np.array(WALL_RGB, np.uint8), np.array(FLOOR_RGB, np.uint8))
+            small = pygame.surfarray.make_surface(rgb.swapaxes(0, 1))
+            surf = pygame.transform.scale(small, (w * s, h * s))
+        else:
+            surf = pygame.Surface((w * s, h * s))
+            surf.fill(FLOOR_RGB)
+            for y, row in enumerate(rows):
+                for x, code in enumerate(row):
+                    if code == WALL:
+                        surf.fill(WALL_RGB, (x * s, y * s, s, s))
+
+        self.layout[key] = surf
+        if len(self.layout) > MINIMAP_CACHE_BLOCKS:
+            self.layout.popitem(last=False)
+        return surf
+
+    # ---------- FOG OF WAR ----------
+    def _reveal_cells(self, cells):
+        s = self.scale
+        for x, y in cells:
+            if not (0 <= x < self.maze.width and 0 <= y < self.maze.height):
+                continue
+            key = (x // MINIMAP_TILE, y // MINIMAP_TILE)
+            flags = self.explored.get(key)
+            if flags is None:
+                flags = self.explored[key] = bytearray(MINIMAP_TILE * MINIMAP_TILE)
+                layout = self._layout_block(key)
+                self.fog[key] = pygame.Surface(layout.get_size())
+                self.fog[key].fill(FOG_RGB)
+            lx, ly = x % MINIMAP_TILE, y % MINIMAP_TILE
+            if flags[ly * MINIMAP_TILE + lx]:
+                continue
+            flags[ly * MINIMAP_TILE + lx] = 1
+            area = (lx * s, ly * s, s, s)
+            self.fog[key].blit(self._layout_block(key), area, area)
+
+    def is_explored(self, x, y):
+        flags = self.explored.get((int(x) // MINIMAP_TILE, int(y) // MINIMAP_TILE))
+        return bool(flags) and bool(flags[(int(y) % MINIMAP_TILE) * MINIMAP_TILE + int(x) % MINIMAP_TILE])
+
+    def reveal(self, cells):
+        # Marks the (x, y) tiles this frame's rays went through, as
+        # collected by raycast.render while it cast them.
+        self._reveal_cells(cells)
+
+    # ---------- DRAW ----------
+    def draw(self, screen, player):
+        s = self.scale
+        size = MINIMAP_SIZE
+        map_w, map_h = self.maze.width * s, self.maze.height * s
+        view_w, view_h = min(size, map_w), min(size, map_h)
+
+        # the window into the level, centred on the player when it is bigger
+        left = max(0, min(int(player.x * s) - view_w // 2, map_w - view_w))
+        top = max(0, min(int(player.y * s) - view_h // 2, map_h - view_h))
+        panel = pygame.Rect(screen.get_width() - view_w - 10, 10, view_w, view_h)
+
+        screen.fill(FOG_RGB, panel)
+        screen.set_clip(panel)
+        b = self.block
+        for by in range(top // b, (top + view_h - 1) // b + 1):
+            for bx in range(left // b, (left + view_w - 1) // b + 1):
+                surf = self.fog.get((bx, by))
+                if surf is not None:
+                    screen.blit(surf, (panel.x + bx * b - left, panel.y + by * b - top))
+
+        maze = self.maze
+        if maze.compass_pos and not maze.compass_taken and self.is_explored(*maze.compass_pos):
+            cx, cy = maze.compass_pos
+            pygame.draw.circle(screen, (0, 255, 255),
+                               (panel.x + int(cx * s) - left, panel.y + int(cy * s) - top), max(2, s))
+
+        px = panel.x + int(player.x * s) - left
+        py = panel.y + int(player.y * s) - top
+        pygame.draw.circle(screen, (255, 60, 60), (px, py), max(2, s))
+        pygame.draw.line(screen, (255, 60, 60), (px, py),
+                         (px + int(math.cos(player.angle) * 3 * s), py + int(math.sin(player.angle) * 3 * s)))
+        screen.set_clip(None)
+        pygame.draw.rect(screen, (90, 90, 90), panel.inflate(2, 2), 1)
\ No newline at end of file
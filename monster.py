@@ -3,29 +3,19 @@ import random
 from settings import *
 
 class Monster:
-    def __init__(self, color, start_pos):
+    def __init__(self, color, start_pos, rng=random):
         self.x, self.y = start_pos
         self.color = color
         self.target = None
         self.reach_thresh = 0.3
+        self.rng = rng
+        self.sees_player = False
 
     def can_see_player(self, player, maze):
-        dx = player.x - self.x
-        dy = player.y - self.y
-        dist = math.hypot(dx, dy)
-        if dist > 8:
-            return False
-        angle = math.atan2(dy, dx)
-        step = 0.1
-        for i in range(int(dist / step)):
-            x = self.x + math.cos(angle) * step * i
-            y = self.y + math.sin(angle) * step * i
-            if maze.is_wall(x, y):
-                return False
-        return True
+        return maze.visibility.can_see(self.x, self.y, player.x, player.y)
 
     def caught_player(self, player):
-        return math.hypot(self.x - player.x, self.y - player.y) < 0.6
+        return math.hypot(self.x - player.x, self.y - player.y) < CATCH_RADIUS
 
     def try_move(self, dx, dy, maze):
         nx = self.x + dx
@@ -35,8 +25,10 @@ class Monster:
         if not maze.is_wall(self.x, ny):
             self.y = ny
 
-    def update(self, player, maze, looking):
-        speed = MONSTER_SPEED / 60
+    def update(self, player, maze, looking, flow=None, dt=SIM_DT):
+        speed = MONSTER_SPEED * dt
+        # one sight query per frame, reused by the spotted overlay
+        self.sees_player = self.can_see_player(player, maze)
         if self.color == "blue" and looking:
             return
         if self.color == "green" and not looking:
@@ -46,16 +38,27 @@ class Monster:
         dy = player.y - self.y
         dist_to_player = math.hypot(dx, dy)
 
-        if self.can_see_player(player, maze) and dist_to_player <= 3:
+        # within NAV_RADIUS steps of the player the flow field leads the
+        # way around walls; on or next to the player's tile, or with the
+        # player in plain sight close by, head straight for them
+        steps = flow.distance(self.x, self.y) if flow else -1
+        if steps > 1:
+            step = flow.next_step(self.x, self.y)
+            self.angle = math.atan2(step[1] - self.y, step[0] - self.x)
+        elif steps >= 0 or (self.sees_player and dist_to_player <= 3):
             self.angle = math.atan2(dy, dx)
         else:
             if self.target is None or math.hypot(self.target[0]-self.x, self.target[1]-self.y) < self.reach_thresh:
-                free_tiles = [(x+0.5, y+0.5) for y in range(maze.height) for x in range(maze.width) if not maze.is_wall(x, y)]
-                self.target = random.choice(free_tiles)
+                self.target = maze.wander_target(self.rng, self.x, self.y)
             dx_t = self.target[0] - self.x
             dy_t = self.target[1] - self.y
             self.angle = math.atan2(dy_t, dx_t)
 
         dx_move = math.cos(self.angle) * speed
         dy_move = math.sin(self.angle) * speed
-        self.try_move(dx_move, dy_move, maze)
\ No newline at end of file
+        old_x, old_y = self.x, self.y
+        self.try_move(dx_move, dy_move, maze)
+
+        # pinned against a wall on the way to a wander target: pick another
+        if math.hypot(self.x - old_x, self.y - old_y) < speed * 0.5:
+            self.target = None
\ No newline at end of file
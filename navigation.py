@@ -0,0 +1,56 @@
+from collections import deque
+from settings import *
+from tiles import WALL
+
+class FlowField:
+    # Breadth-first distance field around the player's tile, shared by
+    # every monster. It is rebuilt only when the player enters a new tile
+    # and is capped at NAV_RADIUS steps; distances live in a dict holding
+    # just the tiles in reach, so its cost and memory do not grow with the
+    # maze or with the number of monsters reading it.
+    def __init__(self, maze, radius=NAV_RADIUS):
+        self.maze = maze
+        self.radius = radius
+        self.dist = {}
+        self.source = None
+
+    def update(self, x, y):
+        source = self.maze.index(x, y)
+        if source == self.source:
+            return
+        self.source = source
+
+        cells = self.maze.cells
+        stride = self.maze.stride
+        offsets = (1, -1, stride, -stride)
+        dist = self.dist = {source: 0}
+
+        queue = deque([source])
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            if d > self.radius:
+                continue
+            for o in offsets:
+                n = i + o
+                if n not in dist and cells[n] != WALL:
+                    dist[n] = d
+                    queue.append(n)
+
+    def distance(self, x, y):
+        # steps to the player's tile, or -1 if outside the field
+        return self.dist.get(self.maze.index(x, y), -1)
+
+    def next_step(self, x, y):
+        # center of the neighbouring tile one step closer to the player,
+        # or None when already next to the player's tile or out of range
+        i = self.maze.index(x, y)
+        d = self.dist.get(i)
+        if d is None or d <= 1:
+            return None
+        stride = self.maze.stride
+        for o in (1, -1, stride, -stride):
+            n = i + o
+            if self.dist.get(n) == d - 1:
+                return (n % stride - 1 + 0.5, n // stride - 1 + 0.5)
+        return None
\ No newline at end of file
@@ -0,0 +1,147 @@
+import json
+import time
+from collections import deque
+from settings import *
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler.add(self.name, self.start, end - self.start)
+        return False
+
+class Profiler:
+    # Per-stage timers with rolling history. While disabled, stage()
+    # returns a shared no-op context manager and count() returns at once,
+    # so instrumented code costs one method call per stage.
+    def __init__(self, window=PROFILE_WINDOW, trace_events=PROFILE_TRACE_EVENTS):
+        self.enabled = False
+        self.window = window
+        self.samples = {}   # stage -> deque of seconds, one per frame
+        self.frame = {}     # stage -> seconds so far this frame
+        self.counters = {}  # counter -> deque of per-frame counts
+        self.frame_counts = {}
+        self.frame_times = deque(maxlen=window)
+        self.trace = deque(maxlen=trace_events)
+
+    def stage(self, name):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def timed(self, name):
+        # decorator form of stage()
+        def wrap(fn):
+            def inner(*args, **kwargs):
+                with self.stage(name):
+                    return fn(*args, **kwargs)
+            inner.__name__ = fn.__name__
+            return inner
+        return wrap
+
+    def add(self, name, start, seconds):
+        self.frame[name] = self.frame.get(name, 0.0) + seconds
+        self.trace.append((name, start, seconds))
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.frame_counts[name] = self.frame_counts.get(name, 0) + n
+
+    def end_frame(self, frame_seconds):
+        if not self.enabled:
+            return
+        self.frame_times.append(frame_seconds)
+        for name, seconds in self.frame.items():
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+            self.samples[name].append(seconds)
+        for name, n in self.frame_counts.items():
+            if name not in self.counters:
+                self.counters[name] = deque(maxlen=self.window)
+            self.counters[name].append(n)
+        self.frame.clear()
+        self.frame_counts.clear()
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if not self.enabled:
+            self.reset()
+
+    def reset(self):
+        self.samples.clear()
+        self.frame.clear()
+        self.counters.clear()
+        self.frame_counts.clear()
+        self.frame_times.clear()
+
+    # ---------------- REPORTING ----------------
+    def stats(self, name):
+        # (mean, p95, max) in milliseconds over the rolling window
+        samples = self.samples.get(name) if name != "frame" else self.frame_times
+        if not samples:
+            return 0.0, 0.0, 0.0
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return (sum(ordered) / len(ordered) * 1000, p95 * 1000, ordered[-1] * 1000)
+
+    def histogram(self, name, bins=16, top_ms=None):
+        # counts of frames per bucket between 0 and top_ms
+        samples = self.samples.get(name) if name != "frame" else self.frame_times
+        counts = [0] * bins
+        if not samples:
+            return counts
+        top = (top_ms or max(samples) * 1000) or 1.0
+        for s in samples:
+            counts[min(bins - 1, int(s * 1000 / top * bins))] += 1
+        return counts
+
+    def counter(self, name):
+        values = self.counters.get(name)
+        return values[-1] if values else 0
+
+    def dump(self, path):
+        # Chrome trace event format (chrome://tracing, Perfetto)
+        events = [
+            {"name": name, "ph": "X", "pid": 0, "tid": 0,
+             "ts": start * 1e6, "dur": seconds * 1e6}
+            for name, start, seconds in self.trace
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events}, f)
+        return len(events)
+
+    # ---------------- CALL COUNTING ----------------
+    def watch_calls(self, obj, method, counter=None):
+        # Shadows obj.method with a counting wrapper until unwatch_calls.
+        counter = counter or method
+        original = getattr(obj, method)
+        count = self.count
+
+        def counted(*args, **kwargs):
+            count(counter)
+            return original(*args, **kwargs)
+        setattr(obj, method, counted)
+
+    def unwatch_calls(self, obj, method):
+        if method in vars(obj):
+            delattr(obj, method)
+
+PROFILER = Profiler()
\ No newline at end of file
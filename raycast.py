@@ -1,93 +1,349 @@
 import pygame
 import math
 from settings import *
+from tiles import WALL
+from profiler import PROFILER
+from textures import WallTextures
 
-def render(screen, player, maze, monsters):
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ---------- DDA RAY CASTER ----------
+def cast_ray(maze, ox, oy, angle, max_depth=MAX_DEPTH, visited=None):
+    # Visits exactly the cells the ray crosses (Amanatides-Woo).
+    # Returns (distance, side, offset) or None if nothing is hit within
+    # max_depth. side is 0 for an x face, 1 for a y face; offset is the
+    # hit position along the wall face in [0, 1). visited, if given, is a
+    # set that receives the maze.cells index of every cell entered.
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+    map_x, map_y = int(ox), int(oy)
+
+    delta_x = abs(1 / cos_a) if cos_a else 1e30
+    delta_y = abs(1 / sin_a) if sin_a else 1e30
+
+    # step through the padded cell array directly; the wall border
+    # guarantees the walk stops before leaving it
+    cells = maze.cells
+    index = maze.index(map_x, map_y)
+
+    if cos_a < 0:
+        step_x = -1
+        side_x = (ox - map_x) * delta_x
+    else:
+        step_x = 1
+        side_x = (map_x + 1 - ox) * delta_x
+    if sin_a < 0:
+        step_y = -maze.stride
+        side_y = (oy - map_y) * delta_y
+    else:
+        step_y = maze.stride
+        side_y = (map_y + 1 - oy) * delta_y
+
+    while True:
+        if side_x < side_y:
+            dist = side_x
+            side_x += delta_x
+            index += step_x
+            side = 0
+        else:
+            dist = side_y
+            side_y += delta_y
+            index += step_y
+            side = 1
+        if dist >= max_depth:
+            return None
+        if visited is not None:
+            visited.add(index)
+        if cells[index] == WALL:
+            break
+
+    if side == 0:
+        hit = oy + dist * sin_a
+    else:
+        hit = ox + dist * cos_a
+    return dist, side, hit - math.floor(hit)
+
+# ---------- NUMPY BACKEND ----------
+def cast_rays_np(grid, ox, oy, angles, max_depth=MAX_DEPTH, visited=None):
+    # Same traversal as cast_ray, for a whole array of angles at once.
+    # visited, if given, is a list that receives an array of flat grid
+    # indices per step.
+    # Returns (distance, side, offset) arrays; distance is inf on a miss.
+    n = len(angles)
+    cos_a = np.cos(angles)
+    sin_a = np.sin(angles)
+    with np.errstate(divide="ignore"):
+        delta_x = np.where(cos_a != 0, np.abs(1 / cos_a), 1e30)
+        delta_y = np.where(sin_a != 0, np.abs(1 / sin_a), 1e30)
+
+    cell_x, cell_y = int(ox), int(oy)
+    map_x = np.full(n, cell_x + 1)
+    map_y = np.full(n, cell_y + 1)
+    step_x = np.where(cos_a < 0, -1, 1)
+    step_y = np.where(sin_a < 0, -1, 1)
+    side_x = np.where(cos_a < 0, ox - cell_x, cell_x + 1 - ox) * delta_x
+    side_y = np.where(sin_a < 0, oy - cell_y, cell_y + 1 - oy) * delta_y
+
+    dist = np.full(n, np.inf)
+    side = np.zeros(n, dtype=np.int8)
+    active = np.arange(n)
+
+    while active.size:
+        sx = side_x[active]
+        sy = side_y[active]
+        x_face = sx < sy
+        d = np.where(x_face, sx, sy)
+
+        side_x[active] = np.where(x_face, sx + delta_x[active], sx)
+        side_y[active] = np.where(x_face, sy, sy + delta_y[active])
+        map_x[active] += np.where(x_face, step_x[active], 0)
+        map_y[active] += np.where(x_face, 0, step_y[active])
+
+        in_range = d < max_depth
+        if visited is not None:
+            visited.append((map_y[active] * grid.shape[1] + map_x[active])[in_range])
+        hit = in_range & grid[map_y[active], map_x[active]]
+        dist[active[hit]] = d[hit]
+        side[active[hit]] = np.where(x_face[hit], 0, 1)
+        active = active[in_range & ~hit]
+
+    # misses keep dist = inf, so inf * 0 and inf - inf must stay quiet
+    with np.errstate(invalid="ignore"):
+        hit_pos = np.where(side == 0, oy + dist * sin_a, ox + dist * cos_a)
+        offset = hit_pos - np.floor(hit_pos)
+    return dist, side, offset
+
+_wall_textures = WallTextures() if WALL_TEXTURES else None
+
+def _texture_offset(side, offset, cos_a, sin_a):
+    # mirror the faces seen from the other side so textures are not flipped
+    if (side == 0 and cos_a > 0) or (side == 1 and sin_a < 0):
+        return 1 - offset
+    return offset
+
+_gray_luts = {}
+
+def _gray_lut(screen):
+    # mapped pixel values of every gray level for this surface format
+    key = (screen.get_bitsize(), screen.get_masks())
+    lut = _gray_luts.get(key)
+    if lut is None:
+        lut = np.array([screen.map_rgb((i, i, i)) for i in range(256)], dtype=np.uint32)
+        _gray_luts[key] = lut
+    return lut
+
+def _render_walls_np(screen, player, maze, visited=None):
+    width = screen.get_width()
+    height = screen.get_height()
+
+    # one ray per screen column
+    rel = -FOV / 2 + np.arange(width) * (FOV / width)
+    grid, ox, oy = maze.wall_window(player.x, player.y, MAX_DEPTH)
+    angles = player.angle + rel
+    steps = [] if visited is not None else None
+    dist, side, offset = cast_rays_np(grid, player.x - ox, player.y - oy, angles, MAX_DEPTH, steps)
+    depth = dist * np.cos(rel)
+    if steps:
+        flat = np.unique(np.concatenate(steps))
+        gw = grid.shape[1]
+        visited.update(zip((flat % gw + ox - 1).tolist(), (flat // gw + oy - 1).tolist()))
+
+    hit = np.isfinite(depth)
+    if _wall_textures is not None:
+        cols = np.flatnonzero(hit)
+        d = depth[cols]
+        h = np.minimum(1 << 20, (height / (d + 0.0001))).astype(np.int64)
+        shade = np.maximum(20, 200 - (d * 30).astype(np.int64))
+        s = side[cols]
+        # y faces a little darker
+        shade = np.where(s == 1, shade * 3 // 4, shade)
+        flip = ((s == 0) & (np.cos(angles[cols]) > 0)) | ((s == 1) & (np.sin(angles[cols]) < 0))
+        u = np.where(flip, 1 - offset[cols], offset[cols])
+        _wall_textures.draw(screen, zip(cols.tolist(), [1] * len(cols), h.tolist(), shade.tolist(), u.tolist()))
+        return depth, 1
+
+    h = np.zeros(width, dtype=np.int64)
+    h[hit] = np.minimum(height, (height / (depth[hit] + 0.0001)).astype(np.int64))
+    shade = np.zeros(width, dtype=np.uint8)
+    shade[hit] = np.maximum(20, 200 - (depth[hit] * 30).astype(np.int64))
+
+    top = height // 2 - h // 2
+    rows = np.arange(height)
+    mask = (rows >= top[:, None]) & (rows < (top + h)[:, None])
+
+    pixels = pygame.surfarray.pixels2d(screen)
+    np.copyto(pixels, _gray_lut(screen)[shade][:, None], where=mask)
+    del pixels
+
+    return depth, 1
+
+def _use_numpy():
+    if RENDER_BACKEND == "numpy":
+        return True
+    return RENDER_BACKEND == "auto" and np is not None
+
+# ---------- PYTHON BACKEND ----------
+def _render_walls(screen, player, maze, num_rays=NUM_RAYS, visited=None):
     width = screen.get_width()
     height = screen.get_height()
+    num_rays = max(1, min(width, num_rays))
     ray_angle = player.angle - FOV / 2
-    ray_width = width // NUM_RAYS
+    # column edges are rounded per ray, so the columns always tile the
+    # full width even when it is not a multiple of num_rays
+    ray_width = width / num_rays
 
     depth_buffer = []
+    columns = []
+    indices = set() if visited is not None else None
 
-    # ---------- WALLS ----------
-    for ray in range(NUM_RAYS):
-        sin_a = math.sin(ray_angle)
-        cos_a = math.cos(ray_angle)
+    for ray in range(num_rays):
+        hit = cast_ray(maze, player.x, player.y, ray_angle, MAX_DEPTH, indices)
 
-        for depth in range(1, int(MAX_DEPTH * 100)):
-            d = depth * 0.01
-            x = player.x + cos_a * d
-            y = player.y + sin_a * d
+        if hit is None:
+            depth_buffer.append(math.inf)
+        else:
+            d = hit[0] * math.cos(player.angle - ray_angle)
+            depth_buffer.append(d)
 
-            if maze.is_wall(x, y):
-                d *= math.cos(player.angle - ray_angle)
-                depth_buffer.append(d)
+            shade = max(20, 200 - int(d * 30))
+            x0 = ray * width // num_rays
+            x1 = (ray + 1) * width // num_rays
 
+            if _wall_textures is not None:
+                side, offset = hit[1], hit[2]
+                u = _texture_offset(side, offset, math.cos(ray_angle), math.sin(ray_angle))
+                h = min(1 << 20, int(height / (d + 0.0001)))
+                columns.append((x0, x1 - x0, h, shade * 3 // 4 if side else shade, u))
+            else:
                 h = min(height, int(height / (d + 0.0001)))
-                shade = max(20, 200 - int(d * 30))
-
                 pygame.draw.rect(
                     screen,
                     (shade, shade, shade),
-                    (ray * ray_width,
+                    (x0,
                      height // 2 - h // 2,
-                     ray_width, h)
+                     x1 - x0, h)
                 )
-                break
 
-        ray_angle += FOV / NUM_RAYS
+        ray_angle += FOV / num_rays
+
+    if columns:
+        _wall_textures.draw(screen, columns)
+    if indices:
+        stride = maze.stride
+        visited.update((i % stride - 1, i // stride - 1) for i in indices)
+
+    return depth_buffer, ray_width
+
+def render(screen, player, maze, actors, scale=1.0, visited=None):
+    # Draws the 3D view and returns the depth buffer, one perpendicular
+    # wall distance per ray (inf where nothing was hit). actors is the
+    # simulation's monster index (a SpatialHash or a MonsterHorde), asked
+    # only for the monsters inside the view cone. The numpy backend
+    # casts one ray per column of screen; the python backend casts
+    # NUM_RAYS scaled by scale. visited, if given, is a set that collects
+    # the (x, y) tiles the rays went through, the walls they hit included.
+    # ---------- WALLS ----------
+    with PROFILER.stage("walls"):
+        if visited is not None:
+            visited.add((int(player.x), int(player.y)))
+        if _use_numpy():
+            depth_buffer, ray_width = _render_walls_np(screen, player, maze, visited)
+        else:
+            num_rays = max(1, round(NUM_RAYS * scale))
+            depth_buffer, ray_width = _render_walls(screen, player, maze, num_rays, visited)
+
+    with PROFILER.stage("sprites"):
+        _render_sprites(screen, player, maze, actors, depth_buffer, ray_width)
+
+    return depth_buffer
+
+# ---------- SPRITES ----------
+MONSTER_RGB = {"red": (255, 0, 0), "blue": (0, 0, 255), "green": (0, 255, 0)}
+EXIT_RGB = (0, 0, 0)
+FAKE_EXIT_RGB = (40, 40, 40)
+COMPASS_RGB = (70, 70, 70)
+
+def _collect_sprites(player, maze, actors):
+    # (x, y, color) of everything that could be on screen
+    sprites = []
+    if maze.exit:
+        ex, ey = maze.exit
+        sprites.append((ex + 0.5, ey + 0.5, EXIT_RGB))
+    for _, fx, fy, _ in maze.entities_in_view(player.x, player.y, player.angle, FOV / 2, MAX_DEPTH, "fake_exit"):
+        sprites.append((fx, fy, FAKE_EXIT_RGB))
+    if maze.compass_pos and not maze.compass_taken:
+        cx, cy = maze.compass_pos
+        sprites.append((cx, cy, COMPASS_RGB))
+    for monster in actors.cone(player.x, player.y, player.angle, FOV / 2, MAX_DEPTH, "monster", 0.5):
+        sprites.append((monster.x, monster.y, MONSTER_RGB[monster.color]))
+    return sprites
+
+def _visible_runs(depth_buffer, first, last, dist):
+    # [start, end) ray ranges within first..last where the sprite is in
+    # front of the wall
+    if np is not None and isinstance(depth_buffer, np.ndarray):
+        visible = np.zeros(last - first + 2, dtype=np.int8)
+        visible[1:-1] = depth_buffer[first:last] > dist
+        edges = np.flatnonzero(np.diff(visible))
+        return zip(edges[::2] + first, edges[1::2] + first)
+
+    runs = []
+    start = None
+    for ray in range(first, last):
+        if dist < depth_buffer[ray]:
+            if start is None:
+                start = ray
+        elif start is not None:
+            runs.append((start, ray))
+            start = None
+    if start is not None:
+        runs.append((start, last))
+    return runs
 
-    # ---------- SPRITE HELPER ----------
-    def draw_sprite(x, y, color):
+def _render_sprites(screen, player, maze, actors, depth_buffer, ray_width):
+    # Culls by distance and field of view, sorts back to front and clips
+    # each sprite per ray column against the wall depths. The surviving
+    # column runs are queued and filled in one pass at the end.
+    width = screen.get_width()
+    height = screen.get_height()
+    rays = len(depth_buffer)
+
+    visible = []
+    for x, y, color in _collect_sprites(player, maze, actors):
         dx = x - player.x
         dy = y - player.y
         dist = math.hypot(dx, dy)
-        if dist < 0.3:
-            return
+        if dist < 0.3 or dist > MAX_DEPTH:
+            continue
 
-        angle = math.atan2(dy, dx)
-        diff = angle - player.angle
-        diff = (diff + math.pi) % (math.tau) - math.pi
+        diff = (math.atan2(dy, dx) - player.angle + math.pi) % math.tau - math.pi
+        # keep sprites whose edge is still inside the view
+        if abs(diff) > FOV / 2 + math.atan2(0.5, dist):
+            continue
+        visible.append((dist, diff, color))
 
-        if abs(diff) > FOV / 2:
-            return
+    visible.sort(reverse=True)
 
+    fills = []
+    for dist, diff, color in visible:
         screen_x = int((diff + FOV / 2) / FOV * width)
         size = int(height / (dist + 0.0001))
-        y_pos = height // 2 - size // 2
-
-        ray_index = int(screen_x / ray_width)
-        if 0 <= ray_index < len(depth_buffer):
-            if dist < depth_buffer[ray_index]:
-                pygame.draw.rect(
-                    screen,
-                    color,
-                    (screen_x - size // 2, y_pos, size, size)
-                )
-
-    # ---------- EXIT ----------
-    if maze.exit:
-        ex, ey = maze.exit
-        draw_sprite(ex + 0.5, ey + 0.5, (0, 0, 0))
+        left = screen_x - size // 2
+        right = left + size
+        first = max(0, int(left / ray_width))
+        last = min(rays, math.ceil(right / ray_width))
+        if first >= last:
+            continue
 
-    # ---------- FAKE EXITS ----------
-    for fx, fy in maze.fake_exits:
-        draw_sprite(fx + 0.5, fy + 0.5, (40, 40, 40))
+        y_pos = height // 2 - size // 2
+        for start, end in _visible_runs(depth_buffer, first, last, dist):
+            x0 = max(left, int(start * ray_width))
+            x1 = min(right, int(end * ray_width))
+            if x1 > x0:
+                fills.append((color, (x0, y_pos, x1 - x0, size)))
 
-    # ---------- COMPASS (WORLD) ----------
-    if maze.compass_pos and not maze.compass_taken:
-        cx, cy = maze.compass_pos
-        draw_sprite(cx, cy, (70, 70, 70))  # dark gray
-
-    # ---------- MONSTERS ----------
-    for monster in monsters:
-        draw_sprite(
-            monster.x,
-            monster.y,
-            {
-                "red": (255, 0, 0),
-                "blue": (0, 0, 255),
-                "green": (0, 255, 0)
-            }[monster.color]
-        )
\ No newline at end of file
+    for color, rect in fills:
+        screen.fill(color, rect)
\ No newline at end of file
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import struct
+import sys
+import time
+import zlib
+from settings import *
+from simulation import Simulation, TickInput
+
+# File layout (little endian):
+#   header  "MZRP", version u8, seed u64, level path (u16 length + utf-8),
+#           sha1 of the level file (20 bytes)
+#   chunks  tick count u32, compressed size u32, zlib(ticks * (flags u8, turn i16))
+#   end     a chunk with a tick count of 0, then the final state:
+#           status (u8 length + ascii), tick u32, player x, y, angle f64
+MAGIC = b"MZRP"
+VERSION = 1
+TICK = struct.Struct("<Bh")
+CHUNK = struct.Struct("<II")
+END = struct.Struct("<Iddd")
+
+def _level_hash(level_path):
+    with open(level_path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+def _pack_input(inp):
+    flags = (inp.forward | inp.back << 1 | inp.left << 2 |
+             inp.right << 3 | inp.run << 4)
+    return TICK.pack(flags, max(-32768, min(32767, inp.turn)))
+
+def _unpack_inputs(data):
+    for flags, turn in TICK.iter_unpack(data):
+        yield TickInput(bool(flags & 1), bool(flags & 2), bool(flags & 4),
+                        bool(flags & 8), bool(flags & 16), turn)
+
+class ReplayWriter:
+    # Streams inputs to disk every REPLAY_CHUNK_TICKS ticks, so a long
+    # session never holds more than one chunk in memory.
+    def __init__(self, path, level_path, seed):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.file = open(path, "wb")
+        level = level_path.encode("utf-8")
+        self.file.write(MAGIC + struct.pack("<BQH", VERSION, seed, len(level)))
+        self.file.write(level + _level_hash(level_path))
+        self.buffer = bytearray()
+        self.pending = 0
+
+    def record(self, inp):
+        self.buffer += _pack_input(inp)
+        self.pending += 1
+        if self.pending >= REPLAY_CHUNK_TICKS:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            data = zlib.compress(bytes(self.buffer))
+            self.file.write(CHUNK.pack(self.pending, len(data)) + data)
+            self.file.flush()
+            self.buffer.clear()
+            self.pending = 0
+
+    def close(self, sim):
+        self.flush()
+        status = sim.status.encode("ascii")
+        self.file.write(CHUNK.pack(0, 0) + bytes([len(status)]) + status)
+        self.file.write(END.pack(sim.tick, sim.player.x, sim.player.y, sim.player.angle))
+        self.file.close()
+
+class ReplayReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        if self.file.read(4) != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        version, self.seed, length = struct.unpack("<BQH", self.file.read(11))
+        if version != VERSION:
+            raise ValueError(f"unsupported replay version {version}")
+        self.level_path = self.file.read(length).decode("utf-8")
+        self.level_hash = self.file.read(20)
+        self.end_state = None  # available once inputs() is exhausted
+
+    def inputs(self):
+        # yields TickInputs one chunk at a time
+        while True:
+            header = self.file.read(CHUNK.size)
+            if len(header) < CHUNK.size:
+                return  # truncated recording (crash or kill)
+            count, size = CHUNK.unpack(header)
+            if count == 0:
+                break
+            yield from _unpack_inputs(zlib.decompress(self.file.read(size)))
+
+        length = self.file.read(1)[0]
+        status = self.file.read(length).decode("ascii")
+        tick, x, y, angle = END.unpack(self.file.read(END.size))
+        self.end_state = (status, tick, x, y, angle)
+
+    def close(self):
+        self.file.close()
+
+def new_replay_path(level_path):
+    name = os.path.splitext(os.path.basename(level_path))[0]
+    return os.path.join(REPLAY_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.mzr")
+
+def end_state(sim):
+    p = sim.player
+    return (sim.status, sim.tick, p.x, p.y, p.angle)
+
+# ---------------- PLAYBACK ----------------
+def play_headless(path):
+    # Re-runs a replay as fast as possible. Returns (simulated, recorded)
+    # end states; recorded is None for a truncated file.
+    reader = ReplayReader(path)
+    if _level_hash(reader.level_path) != reader.level_hash:
+        print(f"warning: {reader.level_path} changed since recording")
+    sim = Simulation.load(reader.level_path, reader.seed)
+    for inp in reader.inputs():
+        sim.step(inp)
+    reader.close()
+    return end_state(sim), reader.end_state
+
+def play_rendered(path, speed=1.0):
+    import pygame
+    from raycast import render
+
+    reader = ReplayReader(path)
+    sim = Simulation.load(reader.level_path, reader.seed)
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Replay - {reader.level_path}")
+    clock = pygame.time.Clock()
+    accumulator = 0.0
+    inputs = reader.inputs()
+
+    for inp in inputs:
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
+                reader.close()
+                pygame.quit()
+                return end_state(sim), None
+        sim.step(inp)
+        accumulator += SIM_DT
+        if accumulator >= speed / FPS:
+            accumulator = 0.0
+            screen.fill((15, 15, 15))
+            render(screen, sim.player, sim.maze, sim.monsters)
+            pygame.display.flip()
+            clock.tick(FPS)
+
+    reader.close()
+    pygame.quit()
+    return end_state(sim), reader.end_state
+
+def main(argv):
+    if not argv:
+        print("usage: python replay.py FILE [--render] [--speed N]")
+        return 2
+    path = argv[0]
+    speed = float(argv[argv.index("--speed") + 1]) if "--speed" in argv else 1.0
+
+    start = time.perf_counter()
+    if "--render" in argv:
+        result, recorded = play_rendered(path, speed)
+    else:
+        result, recorded = play_headless(path)
+    elapsed = time.perf_counter() - start
+
+    status, tick = result[0], result[1]
+    print(f"{status} after {tick} ticks ({tick * SIM_DT:.1f}s of play in {elapsed:.2f}s)")
+    if recorded is None:
+        print("no recorded end state to compare against")
+        return 0
+    if recorded != result:
+        print(f"MISMATCH: recorded {recorded}, replayed {result}")
+        return 1
+    print("end state matches the recording")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
\ No newline at end of file
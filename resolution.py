@@ -0,0 +1,48 @@
+import pygame
+from settings import *
+
+# ---------------- DYNAMIC RESOLUTION ----------------
+class DynamicResolution:
+    # Picks the size of the surface the 3D view is drawn into. The frame
+    # time is smoothed and compared against FRAME_BUDGET_MS: over budget
+    # the scale drops a step, well under it the scale creeps back up. The
+    # view is then stretched to the display in a single blit.
+    def __init__(self, enabled=DYNAMIC_RESOLUTION, budget_ms=FRAME_BUDGET_MS):
+        self.enabled = enabled
+        self.budget_ms = budget_ms
+        self.scale = RENDER_SCALE_MAX
+        self.frame_ms = 0.0
+        self.cooldown = 0
+        self.surface = None
+
+    def surface_for(self, display):
+        if not self.enabled:
+            return display
+        w, h = display.get_size()
+        size = (max(1, int(w * self.scale)), max(1, int(h * self.scale)))
+        if size == (w, h):
+            # full size: draw straight to the display, present has nothing to do
+            return display
+        if self.surface is None or self.surface.get_size() != size:
+            # same pixel format as the display so the final blit is a copy
+            self.surface = pygame.Surface(size, 0, display)
+        return self.surface
+
+    def present(self, view, display):
+        if view is not display:
+            pygame.transform.scale(view, display.get_size(), display)
+
+    def update(self, frame_ms):
+        if not self.enabled:
+            return
+        self.frame_ms += (frame_ms - self.frame_ms) * 0.1
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+        if self.frame_ms > self.budget_ms and self.scale > RENDER_SCALE_MIN:
+            self.scale = max(RENDER_SCALE_MIN, round(self.scale - RENDER_SCALE_STEP, 2))
+            self.cooldown = 10
+        elif self.frame_ms < self.budget_ms * 0.7 and self.scale < RENDER_SCALE_MAX:
+            # climb back slowly so it does not oscillate around the budget
+            self.scale = min(RENDER_SCALE_MAX, round(self.scale + RENDER_SCALE_STEP, 2))
+            self.cooldown = 60
\ No newline at end of file
@@ -3,16 +3,91 @@ import math
 WIDTH, HEIGHT = 960, 540
 FPS = 60
 
+# game logic runs at a fixed rate, independent of the frame rate
+TICK_RATE = 60
+MENU_FPS = 30
+SIM_DT = 1 / TICK_RATE
+
 FOV = math.pi / 3
 NUM_RAYS = 160
 MAX_DEPTH = 20
 
+# "auto" uses NumPy when installed (one ray per screen column),
+# "numpy" requires it, "python" always uses NUM_RAYS scalar rays
+RENDER_BACKEND = "auto"
+
+# the 3D view is drawn at RENDER_SCALE_MIN..MAX of the window size, picked
+# each frame to keep the frame under FRAME_BUDGET_MS
+DYNAMIC_RESOLUTION = True
+FRAME_BUDGET_MS = 12.0
+RENDER_SCALE_MIN = 0.35
+RENDER_SCALE_MAX = 1.0
+RENDER_SCALE_STEP = 0.05
+
+# textured walls: TEXTURE_PATH (a brick pattern is generated when missing)
+# is pre-shaded into TEXTURE_SHADES copies, and scaled wall strips are
+# cached up to TEXTURE_CACHE_BYTES
+WALL_TEXTURES = True
+TEXTURE_PATH = "textures/wall.png"
+TEXTURE_SIZE = 64
+TEXTURE_SHADES = 16
+TEXTURE_CACHE_BYTES = 24 * 1024 * 1024
+
+MOUSE_SENSITIVITY = 0.002
+
 PLAYER_WALK_SPEED = 2.0
 PLAYER_RUN_SPEED = 3.2
 MONSTER_SPEED = 2.6
+# a monster closer than this to the player catches them
+CATCH_RADIUS = 0.6
+# levels with at least this many monsters step them as one NumPy batch
+HORDE_MIN_MONSTERS = 16
+
+# how many steps from the player the monster flow field reaches
+NAV_RADIUS = 24
+
+# monsters spot the player within this many tiles of clear line of sight
+SIGHT_RADIUS = 8
+LOS_CACHE_SIZE = 65536
+
+# spatial hash cell sizes in tiles: level entities (exits, compass) and
+# moving actors (monsters)
+ENTITY_CELL_SIZE = 16
+ACTOR_CELL_SIZE = 4
 
 STAMINA_MAX = 5.0
 STAMINA_DRAIN = 1.2
 STAMINA_REGEN = 0.3
 
+# every level run is recorded so it can be replayed with replay.py
+RECORD_REPLAYS = True
+REPLAY_DIR = "replays"
+REPLAY_CHUNK_TICKS = 600
+
+# binary levels larger than this many tiles are paged in by chunk
+CHUNKED_LEVEL_TILES = 16_000_000
+CHUNK_SIZE = 64
+CHUNK_CACHE_BYTES = 32 * 1024 * 1024
+# levels above this size pick wander targets within WANDER_RADIUS tiles
+# instead of from a list of every open tile
+WANDER_LIST_MAX_TILES = 1_000_000
+WANDER_RADIUS = 32
+
+# parsed levels kept in memory for instant restarts
+LEVEL_CACHE_SIZE = 4
+
+# minimap (M in game): MINIMAP_SIZE pixels square, MINIMAP_MIN_SCALE..
+# MINIMAP_MAX_SCALE pixels per tile, larger levels scroll with the player;
+# the wall layout is cached in blocks of MINIMAP_TILE tiles
+MINIMAP = True
+MINIMAP_SIZE = 200
+MINIMAP_MIN_SCALE = 2
+MINIMAP_MAX_SCALE = 8
+MINIMAP_TILE = 64
+MINIMAP_CACHE_BLOCKS = 64
+
+# profiler HUD (F3 in game, F4 dumps a trace file)
+PROFILE_WINDOW = 240
+PROFILE_TRACE_EVENTS = 200000
+
 TILE = 1
\ No newline at end of file
@@ -0,0 +1,134 @@
+import math
+import random
+from collections import namedtuple
+from settings import *
+from maze import Maze
+from player import Player
+from monster import Monster
+from horde import MonsterHorde
+from navigation import FlowField
+from visibility import Visibility
+from spatial import SpatialHash
+from profiler import PROFILER
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# One tick of player input. turn is the raw horizontal mouse delta.
+TickInput = namedtuple("TickInput", "forward back left right run turn")
+IDLE = TickInput(False, False, False, False, False, 0)
+
+class Simulation:
+    # All game logic for one level, stepped at a fixed dt (SIM_DT in the
+    # game). Nothing in here touches pygame, so it runs the same with or
+    # without a display. dt and the two radii are taken here rather than
+    # read from settings so headless runs can vary them per simulation.
+    def __init__(self, maze, seed=None, dt=SIM_DT, sight_radius=SIGHT_RADIUS, nav_radius=NAV_RADIUS):
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.maze = maze
+        self.dt = dt
+        if maze.visibility.radius != sight_radius:
+            # a clone shares its level's Visibility; give this run its own
+            maze.visibility = Visibility(maze, sight_radius)
+        self.player = Player(maze.player_start)
+        self.horde = None
+        if np is not None and len(maze.monsters_info) >= HORDE_MIN_MONSTERS:
+            # monsters are rows of one batch and self.monsters holds views;
+            # the batch answers proximity queries with one array scan,
+            # which beats keeping a hash in sync with every row
+            self.horde = MonsterHorde(maze.monsters_info, self.rng)
+            self.monsters = self.horde.views
+            self.actors = self.horde
+        else:
+            self.monsters = [Monster(color, pos, self.rng) for color, pos in maze.monsters_info]
+            # monsters by position, moved as they walk
+            self.actors = SpatialHash(ACTOR_CELL_SIZE)
+            for monster in self.monsters:
+                self.actors.insert(monster, "monster", monster.x, monster.y)
+        self.flow = FlowField(maze, nav_radius)
+        self.tick = 0
+        self.status = "playing"  # "playing", "won" or "caught"
+        self.events = []  # what happened during the last step
+
+    @classmethod
+    def load(cls, level_path, seed=None):
+        return cls(Maze(level_path), seed)
+
+    def step(self, inp):
+        dt = self.dt
+        maze = self.maze
+        player = self.player
+        self.events = []
+
+        # movement
+        with PROFILER.stage("player"):
+            player.angle += inp.turn * MOUSE_SENSITIVITY
+
+            speed = PLAYER_WALK_SPEED
+            if inp.run and player.stamina > 0:
+                speed = PLAYER_RUN_SPEED
+                player.stamina -= STAMINA_DRAIN * dt
+            else:
+                player.stamina += STAMINA_REGEN * dt
+            player.stamina = max(0, min(STAMINA_MAX, player.stamina))
+
+            dx = math.cos(player.angle) * speed * dt
+            dy = math.sin(player.angle) * speed * dt
+            if inp.forward: player.move(dx, dy, maze)
+            if inp.back: player.move(-dx, -dy, maze)
+            if inp.left: player.move(dy, -dx, maze)
+            if inp.right: player.move(-dy, dx, maze)
+
+        # monster logic
+        with PROFILER.stage("monsters"):
+            self.flow.update(player.x, player.y)
+            if self.horde is not None:
+                self.horde.update(player, maze, self.flow, dt)
+            else:
+                for monster in self.monsters:
+                    angle_to_monster = math.atan2(monster.y - player.y, monster.x - player.x)
+                    angle_diff = (angle_to_monster - player.angle + math.pi) % math.tau - math.pi
+                    looking_at_monster = abs(angle_diff) < FOV / 6
+                    monster.update(player, maze, looking_at_monster, self.flow, dt)
+                    self.actors.move(monster, monster.x, monster.y)
+
+        # compass
+        if not maze.compass_taken:
+            maze.check_compass_pickup(player.x, player.y)
+            if maze.compass_taken:
+                self.events.append("compass")
+
+        # fake exit
+        if maze.reached_fake_exit(player.x, player.y):
+            self.events.append("fake_exit")
+            player.x, player.y = maze.player_start
+
+        # caught / real exit
+        if self.horde is not None:
+            caught = self.horde.caught(player)
+        else:
+            nearby = self.actors.near(player.x, player.y, CATCH_RADIUS, "monster")
+            caught = any(monster.caught_player(player) for monster in nearby)
+        if caught:
+            self.status = "caught"
+        elif maze.reached_real_exit(player.x, player.y):
+            self.status = "won"
+
+        self.tick += 1
+        return self.status
+
+    def run(self, inputs, max_ticks=None):
+        # Steps through an iterable of TickInput until the level ends, the
+        # inputs run out or max_ticks is reached.
+        for inp in inputs:
+            if self.status != "playing":
+                break
+            if max_ticks is not None and self.tick >= max_ticks:
+                break
+            self.step(inp)
+        return self.status
\ No newline at end of file
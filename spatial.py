@@ -0,0 +1,95 @@
+import math
+from settings import *
+
+class SpatialHash:
+    # Uniform grid of cell_size x cell_size buckets. Every object is stored
+    # with its kind and position; moving one only touches the buckets when
+    # it crosses a cell edge. Radius and cone queries visit the cells that
+    # can overlap the query shape and test the entries in them exactly.
+    def __init__(self, cell_size=ACTOR_CELL_SIZE):
+        self.size = cell_size
+        self.buckets = {}  # (cx, cy) -> {obj: (kind, x, y)}
+        self.cell_of = {}  # obj -> (cx, cy)
+
+    def __len__(self):
+        return len(self.cell_of)
+
+    def __contains__(self, obj):
+        return obj in self.cell_of
+
+    def _key(self, x, y):
+        return (int(x // self.size), int(y // self.size))
+
+    def insert(self, obj, kind, x, y):
+        key = self._key(x, y)
+        self.cell_of[obj] = key
+        self.buckets.setdefault(key, {})[obj] = (kind, x, y)
+
+    def remove(self, obj):
+        key = self.cell_of.pop(obj)
+        bucket = self.buckets[key]
+        del bucket[obj]
+        if not bucket:
+            del self.buckets[key]
+
+    def move(self, obj, x, y):
+        old = self.cell_of[obj]
+        kind = self.buckets[old][obj][0]
+        key = self._key(x, y)
+        if key == old:
+            self.buckets[key][obj] = (kind, x, y)
+            return
+        self.remove(obj)
+        self.cell_of[obj] = key
+        self.buckets.setdefault(key, {})[obj] = (kind, x, y)
+
+    def _cells(self, x, y, radius):
+        size = self.size
+        for cy in range(int((y - radius) // size), int((y + radius) // size) + 1):
+            for cx in range(int((x - radius) // size), int((x + radius) // size) + 1):
+                bucket = self.buckets.get((cx, cy))
+                if bucket:
+                    yield cx, cy, bucket
+
+    def near(self, x, y, radius, kind=None):
+        # objects within radius of (x, y)
+        found = []
+        r2 = radius * radius
+        for _, _, bucket in self._cells(x, y, radius):
+            for obj, (k, ox, oy) in bucket.items():
+                if (kind is None or k == kind) and (ox - x) ** 2 + (oy - y) ** 2 <= r2:
+                    found.append(obj)
+        return found
+
+    def cone(self, x, y, angle, half_angle, radius, kind=None, pad=0.0):
+        # objects within radius whose direction from (x, y) is within
+        # half_angle of angle; pad widens the test to discs of that radius
+        found = []
+        r2 = radius * radius
+        size = self.size
+        cell_pad = size * 0.7072  # half the cell diagonal
+        for cx, cy, bucket in self._cells(x, y, radius):
+            # skip whole cells that lie outside the cone
+            mx = (cx + 0.5) * size - x
+            my = (cy + 0.5) * size - y
+            d = math.hypot(mx, my)
+            if d > cell_pad + pad:
+                diff = (math.atan2(my, mx) - angle + math.pi) % math.tau - math.pi
+                if abs(diff) > half_angle + math.asin((cell_pad + pad) / d):
+                    continue
+
+            for obj, (k, ox, oy) in bucket.items():
+                if kind is not None and k != kind:
+                    continue
+                dx = ox - x
+                dy = oy - y
+                d2 = dx * dx + dy * dy
+                if d2 > r2:
+                    continue
+                d = math.sqrt(d2)
+                if d > pad:
+                    diff = (math.atan2(dy, dx) - angle + math.pi) % math.tau - math.pi
+                    if abs(diff) > half_angle + math.asin(pad / d):
+                        continue
+                found.append(obj)
+        return found
\ No newline at end of file
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Launches main.py with MAZE_STARTUP_PROBE set, which makes it exit right
+# after the first menu frame, and reports the time to that frame plus the
+# slowest imports from python's -X importtime output.
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"
+    imports = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|", 2)
+        imports[name.strip()] = (int(self_us), int(cumulative))
+    return imports
+
+def launch():
+    env = dict(os.environ, MAZE_STARTUP_PROBE="1")
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+    env.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "main.py"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.exit(proc.stderr[-2000:])
+    first_frame = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("first_frame "):
+            first_frame = float(line.split()[1])
+    return wall, first_frame, parse_importtime(proc.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time to the first menu frame.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--baseline", help="fail if slower than this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    walls, frames, imports = [], [], {}
+    for _ in range(args.runs):
+        wall, first_frame, imports = launch()
+        walls.append(wall)
+        frames.append(first_frame)
+
+    # the numbers below are the last run's; earlier runs warm the disk cache
+    top = sorted(imports.items(), key=lambda kv: kv[1][1], reverse=True)
+    top_level = [(n, t) for n, t in top if "." not in n][:args.top]
+    results = {
+        "process_ms": statistics.median(walls) * 1000,
+        "first_frame_ms": statistics.median(frames) * 1000,
+        "imports_ms": {n: cumulative / 1000 for n, (_, cumulative) in top_level},
+    }
+
+    print(f"process start to exit : {results['process_ms']:8.1f} ms")
+    print(f"script to first frame : {results['first_frame_ms']:8.1f} ms")
+    print("slowest imports (cumulative):")
+    for name, ms in results["imports_ms"].items():
+        print(f"  {name:24} {ms:8.1f} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            before = json.load(f)["first_frame_ms"]
+        if results["first_frame_ms"] > before * (1 + args.tolerance) + 5:
+            print(f"\nSTARTUP REGRESSION: {before:.1f}ms -> {results['first_frame_ms']:.1f}ms")
+            return 1
+        print("\nno regression against", args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import random
+from collections import OrderedDict
+import pygame
+from settings import *
+from profiler import PROFILER
+
+# ---------------- WALL TEXTURES ----------------
+class WallTextures:
+    # Textured wall columns without per-pixel work. The texture is loaded
+    # once and pre-shaded into TEXTURE_SHADES darker copies. A wall column
+    # is then a vertical strip of one shaded copy, scaled to the column's
+    # height; strips are built on first use and kept in an LRU bounded by
+    # TEXTURE_CACHE_BYTES. Heights are quantized (about 3% steps above 64
+    # pixels) so neighbouring columns and frames share strips, and the
+    # screen height is part of the key, so resolution changes just age the
+    # old strips out.
+    def __init__(self, path=TEXTURE_PATH, size=TEXTURE_SIZE, budget=TEXTURE_CACHE_BYTES):
+        self.path = path
+        self.size = size
+        self.budget = budget
+        self.shaded = None
+        self.strips = OrderedDict()
+        self.nbytes = 0
+
+    def _load(self, screen):
+        if os.path.exists(self.path):
+            texture = pygame.image.load(self.path)
+            texture = pygame.transform.smoothscale(texture.convert(screen), (self.size, self.size))
+        else:
+            texture = brick_texture(self.size, screen)
+        self.shaded = []
+        for level in range(TEXTURE_SHADES):
+            variant = texture.copy()
+            f = int(255 * (level + 1) / TEXTURE_SHADES)
+            variant.fill((f, f, f), special_flags=pygame.BLEND_RGB_MULT)
+            self.shaded.append(variant)
+
+    @staticmethod
+    def quantize(h):
+        if h < 64:
+            return h
+        step = h >> 5
+        return (h + step // 2) // step * step
+
+    def strip(self, u, h, shade, width, screen_h):
+        # strip for texture column u drawn h pixels tall at shade (0-255),
+        # clipped to the screen; returns (surface, top)
+        level = min(TEXTURE_SHADES - 1, shade * TEXTURE_SHADES // 256)
+        h = self.quantize(h)
+        key = (u, h, level, width, screen_h)
+        surf = self.strips.get(key)
+        if surf is not None:
+            self.strips.move_to_end(key)
+        else:
+            PROFILER.count("texture_miss")
+            size = self.size
+            if h <= screen_h:
+                column = self.shaded[level].subsurface((u, 0, 1, size))
+                surf = pygame.transform.scale(column, (width, h))
+            else:
+                # only the middle of the column is on screen
+                visible = max(1, size * screen_h // h)
+                column = self.shaded[level].subsurface((u, (size - visible) // 2, 1, visible))
+                surf = pygame.transform.scale(column, (width, screen_h))
+            self.strips[key] = surf
+            self.nbytes += surf.get_width() * surf.get_height() * surf.get_bytesize()
+            while self.nbytes > self.budget and len(self.strips) > 1:
+                _, old = self.strips.popitem(last=False)
+                self.nbytes -= old.get_width() * old.get_height() * old.get_bytesize()
+        return surf, max(0, screen_h // 2 - h // 2)
+
+    def draw(self, screen, columns):
+        # columns: (x, width, height, shade, hit offset in [0, 1)) per wall
+        # slice; everything goes out in one blits() call
+        if self.shaded is None:
+            self._load(screen)
+        screen_h = screen.get_height()
+        size = self.size
+        batch = []
+        for x, width, h, shade, offset in columns:
+            surf, top = self.strip(min(size - 1, int(offset * size)), h, shade, width, screen_h)
+            batch.append((surf, (x, top)))
+        screen.blits(batch, doreturn=False)
+
+def brick_texture(size, screen):
+    # stand-in texture used when TEXTURE_PATH does not exist
+    rng = random.Random(0)
+    tex = pygame.Surface((size, size), 0, screen)
+    tex.fill((70, 70, 70))
+    rows = 4
+    brick_h = size // rows
+    brick_w = size // 2
+    for row in range(rows):
+        shift = (row % 2) * brick_w // 2
+        for col in range(-1, 3):
+            g = rng.randint(150, 200)
+            rect = pygame.Rect(col * brick_w + shift + 1, row * brick_h + 1, brick_w - 2, brick_h - 2)
+            tex.fill((g, g, g), rect)
+    for _ in range(size * 4):
+        x, y = rng.randrange(size), rng.randrange(size)
+        c = tex.get_at((x, y))
+        d = rng.randint(-25, 25)
+        tex.set_at((x, y), [max(0, min(255, v + d)) for v in c[:3]])
+    return tex
\ No newline at end of file
@@ -0,0 +1,7 @@
+# Tile codes stored in Maze.cells (the level file characters themselves)
+WALL = ord("#")
+FLOOR = ord(".")
+START = ord("P")
+EXIT = ord("E")
+FAKE_EXIT = ord("F")
+COMPASS = ord("C")
\ No newline at end of file
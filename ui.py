@@ -1,43 +1,114 @@
 import pygame
 import sys
 
+from settings import *
+
+# ---------------- SURFACE CACHE ----------------
+# Fonts, rendered text and translucent fills are built once and reused.
+# Text is keyed on (text, font, color), fills on (size, color, alpha);
+# clear_surface_cache() drops both when the resolution changes.
+_fonts = {}
+_texts = {}
+_fills = {}
+TEXT_CACHE_MAX = 512
+
+def get_font(size, name=None):
+    key = (name, size)
+    if key not in _fonts:
+        _fonts[key] = pygame.font.SysFont(name, size)
+    return _fonts[key]
+
+def text_surface(text, size, color, name=None):
+    key = (text, name, size, color)
+    surf = _texts.get(key)
+    if surf is None:
+        if len(_texts) >= TEXT_CACHE_MAX:
+            _texts.clear()
+        surf = _texts[key] = get_font(size, name).render(text, True, color)
+    return surf
+
+def fill_surface(size, color, alpha):
+    key = (size, color, alpha)
+    surf = _fills.get(key)
+    if surf is None:
+        surf = _fills[key] = pygame.Surface(size)
+        surf.set_alpha(alpha)
+        surf.fill(color)
+    return surf
+
+def clear_surface_cache():
+    _texts.clear()
+    _fills.clear()
+
 def overlay(screen, color):
-    surf = pygame.Surface(screen.get_size())
-    surf.set_alpha(70)
-    surf.fill(color)
-    screen.blit(surf, (0, 0))
+    screen.blit(fill_surface(screen.get_size(), color, 70), (0, 0))
 
-def game_over_screen(screen):
-    return menu_screen(screen, "GAME OVER", (200, 0, 0))
+# ---------------- PROFILER HUD ----------------
+HUD_STAGES = ["input", "player", "monsters", "walls", "sprites", "scale", "minimap", "overlay", "flip"]
+
+def draw_profiler_hud(screen, profiler, rays, scale=1.0):
+    # the numbers change every frame, so lines are rendered directly rather
+    # than through the text cache
+    hud_font = get_font(14, "monospace")
+    screen.blit(fill_surface((300, 40 + 18 * (len(HUD_STAGES) + 3)), (0, 0, 0), 180), (8, 8))
 
-def win_screen(screen):
-    return menu_screen(screen, "YAY, YOU WON!", (0, 200, 0))
+    frame_mean, frame_p95, _ = profiler.stats("frame")
+    fps = 1000 / frame_mean if frame_mean else 0
+    lines = [
+        f"frame {frame_mean:6.2f}ms p95 {frame_p95:6.2f}  {fps:5.1f} fps",
+        f"rays {rays} scale {scale:.2f}",
+        # only calls through Maze.is_wall: the ray casters, line of sight
+        # and flow field read maze.cells directly and are not counted
+        f"Maze.is_wall calls/frame {profiler.counter('Maze.is_wall')}",
+    ]
+    for name in HUD_STAGES:
+        mean, p95, worst = profiler.stats(name)
+        lines.append(f"{name:>9} {mean:6.2f} {p95:6.2f} {worst:6.2f}")
 
-def menu_screen(screen, title_text, title_color):
-    font_big = pygame.font.SysFont(None, 72)
-    font = pygame.font.SysFont(None, 40)
+    for i, line in enumerate(lines):
+        screen.blit(hud_font.render(line, True, (0, 255, 0)), (14, 12 + i * 18))
 
-    options = ["Back to Menu", "Quit Game"]
+    # frame time histogram, 0..33ms
+    counts = profiler.histogram("frame", bins=32, top_ms=33.3)
+    peak = max(counts) or 1
+    base_y = 12 + len(lines) * 18 + 26
+    for i, c in enumerate(counts):
+        h = int(24 * c / peak)
+        pygame.draw.rect(screen, (0, 200, 0), (14 + i * 8, base_y - h, 6, h))
+
+def game_over_screen(screen):
+    return menu_screen(screen, "GAME OVER", (200, 0, 0), ["Restart", "Back to Menu", "Quit Game"])
+
+def win_screen(screen, has_next=False):
+    options = ["Next Level"] if has_next else []
+    return menu_screen(screen, "YAY, YOU WON!", (0, 200, 0), options + ["Back to Menu", "Quit Game"])
+
+def menu_screen(screen, title_text, title_color, options=("Back to Menu", "Quit Game")):
+    # Redrawn only when the selection changes; between events the loop
+    # sleeps on the clock instead of spinning.
+    clock = pygame.time.Clock()
     selected = 0
+    dirty = True
 
     while True:
-        screen.fill((0, 0, 0))
+        if dirty:
+            screen.fill((0, 0, 0))
 
-        title = font_big.render(title_text, True, title_color)
-        screen.blit(
-            title,
-            (screen.get_width() // 2 - title.get_width() // 2, 120)
-        )
-
-        for i, opt in enumerate(options):
-            color = (255, 255, 255) if i == selected else (120, 120, 120)
-            text = font.render(opt, True, color)
+            title = text_surface(title_text, 72, title_color)
             screen.blit(
-                text,
-                (screen.get_width() // 2 - 120, 260 + i * 60)
+                title,
+                (screen.get_width() // 2 - title.get_width() // 2, 120)
             )
 
-        pygame.display.flip()
+            for i, opt in enumerate(options):
+                color = (255, 255, 255) if i == selected else (120, 120, 120)
+                screen.blit(
+                    text_surface(opt, 40, color),
+                    (screen.get_width() // 2 - 120, 260 + i * 60)
+                )
+
+            pygame.display.flip()
+            dirty = False
 
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
@@ -47,7 +118,14 @@ def menu_screen(screen, title_text, title_color):
             if e.type == pygame.KEYDOWN:
                 if e.key == pygame.K_UP:
                     selected = (selected - 1) % len(options)
+                    dirty = True
                 if e.key == pygame.K_DOWN:
                     selected = (selected + 1) % len(options)
+                    dirty = True
                 if e.key == pygame.K_RETURN:
-                    return options[selected]
\ No newline at end of file
+                    return options[selected]
+
+            if e.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty = True
+
+        clock.tick(MENU_FPS)
\ No newline at end of file
@@ -0,0 +1,332 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from settings import *
+from tiles import *
+from levelfile import MONSTER_LETTERS, is_binary_level, read_header
+
+# Checks level files without going through Maze, so broken files are
+# reported instead of crashing, and measures how hard they are to solve.
+# Results are cached by file content hash; bump VERSION when the checks
+# or metrics change so stale cache entries are ignored.
+VERSION = 4
+TILE_CHARS = set("#.PEFCRBG")
+MONSTER_TILES = {ord(letter) for letter in MONSTER_LETTERS.values()}
+
+# ---------------- PARSING ----------------
+def _read_json(path, errors, warnings):
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        errors.append(f"cannot parse: {e}")
+        return None
+    rows = data.get("map") if isinstance(data, dict) else None
+    if not isinstance(rows, list) or not rows or not all(isinstance(r, str) for r in rows):
+        errors.append('no "map" list of row strings')
+        return None
+
+    # the first row sets the width, as in Maze
+    width = len(rows[0])
+    short = [y for y, row in enumerate(rows) if len(row) < width]
+    long = [y for y, row in enumerate(rows) if len(row) > width]
+    if short:
+        errors.append(f"rows shorter than width {width}: {_short(short)}")
+    if long:
+        warnings.append(f"rows longer than width {width}, extra tiles ignored: {_short(long)}")
+    bad = sorted(set("".join(rows)) - TILE_CHARS)
+    if bad:
+        errors.append(f"unknown tile characters: {''.join(bad)}")
+
+    border = rows[0] + rows[-1] + "".join(r[:1] + r[width - 1:width] for r in rows)
+    if set(border) - {"#"}:
+        warnings.append("outer border is not closed (it is treated as wall)")
+    return width, len(rows), [r[:width].ljust(width, "#").encode("ascii", "replace") for r in rows]
+
+def _read_binary(path, errors, warnings):
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        header = read_header(data)
+    except (ValueError, KeyError, IndexError) as e:
+        errors.append(f"bad binary level: {e}")
+        return None
+    stride = header.width + 2
+
+    outside = [(x, y) for _, x, y in header.monsters
+               if not (0 <= x < header.width and 0 <= y < header.height)]
+    if outside:
+        errors.append(f"monsters outside the map: {_short(outside)}")
+    rows = []
+    for y in range(header.height):
+        start = header.tiles_offset + (y + 1) * stride + 1
+        row = bytearray(data[start:start + header.width])
+        for color, x, my in header.monsters:
+            if my == y and 0 <= x < header.width:
+                row[x] = ord(MONSTER_LETTERS[color])
+        rows.append(row)
+
+    # the game takes the start, exit and compass from the header tables,
+    # so those are what gets checked; letters in the tiles are just floor
+    for letter, name, pos in (("P", "player start", header.player), ("E", "exit", header.exit),
+                              ("C", "compass", header.compass)):
+        code = ord(letter)
+        stray = [(x, y) for y, row in enumerate(rows) for x in _find_all(row, code) if (x, y) != pos]
+        if stray:
+            where = f"the header's {name} is {pos}" if pos else f"the header has no {name}"
+            warnings.append(f"{letter} tiles ignored, {where}: {_short(stray)}")
+            for x, y in stray:
+                rows[y][x] = FLOOR
+        if pos is None:
+            continue
+        x, y = pos
+        if not (0 <= x < header.width and 0 <= y < header.height):
+            errors.append(f"header {name} {pos} is outside the map")
+        elif rows[y][x] == WALL:
+            errors.append(f"header {name} {pos} is inside a wall")
+        else:
+            rows[y][x] = code
+    return header.width, header.height, [bytes(row) for row in rows]
+
+def _find_all(row, code):
+    i = row.find(code)
+    while i >= 0:
+        yield i
+        i = row.find(code, i + 1)
+
+def _short(items, limit=8):
+    text = ", ".join(str(i) for i in items[:limit])
+    return text + (f" (+{len(items) - limit} more)" if len(items) > limit else "")
+
+# ---------------- ANALYSIS ----------------
+def _bfs(cells, stride, source, blocked=(WALL,)):
+    dist = array("i", [-1]) * len(cells)
+    dist[source] = 0
+    queue = deque([source])
+    offsets = (1, -1, stride, -stride)
+    while queue:
+        i = queue.popleft()
+        d = dist[i] + 1
+        for o in offsets:
+            n = i + o
+            if dist[n] < 0 and cells[n] not in blocked:
+                dist[n] = d
+                queue.append(n)
+    return dist
+
+def check_level(path):
+    errors, warnings = [], []
+    if is_binary_level(path):
+        parsed = _read_binary(path, errors, warnings)
+    else:
+        parsed = _read_json(path, errors, warnings)
+    result = {"path": path, "errors": errors, "warnings": warnings, "metrics": {}}
+    if parsed is None:
+        return result
+
+    width, height, rows = parsed
+    stride = width + 2
+    cells = bytearray([WALL]) * (stride * (height + 2))
+    for y, row in enumerate(rows):
+        start = (y + 1) * stride + 1
+        # slice assignment must not change the length of cells
+        cells[start:start + width] = row[:width].ljust(width, b"#")
+
+    def find(code):
+        found = []
+        i = cells.find(code)
+        while i >= 0:
+            found.append(i)
+            i = cells.find(code, i + 1)
+        return found
+
+    def xy(i):
+        return (i % stride - 1, i // stride - 1)
+
+    starts, exits, compasses = find(START), find(EXIT), find(COMPASS)
+    fakes = find(FAKE_EXIT)
+    monsters = [i for code in MONSTER_TILES for i in find(code)]
+
+    if not starts:
+        errors.append("no player start (P)")
+    elif len(starts) > 1:
+        errors.append(f"{len(starts)} player starts (P) at {_short([xy(i) for i in starts])}")
+    if not exits:
+        errors.append("no exit (E)")
+    elif len(exits) > 1:
+        warnings.append(f"{len(exits)} exits (E); only the last one counts")
+    if len(compasses) > 1:
+        warnings.append(f"{len(compasses)} compasses (C); only the last one counts")
+    if not starts:
+        return result
+
+    # a fake exit sends the player back to the start, so the exit and the
+    # compass only count as reachable along paths that avoid them; the
+    # open search (fake exits walkable) covers the rest of the layout
+    dist = _bfs(cells, stride, starts[-1])
+    safe = _bfs(cells, stride, starts[-1], (WALL, FAKE_EXIT)) if fakes else dist
+    metrics = result["metrics"]
+    open_tiles = len(cells) - cells.count(WALL)
+    reachable = sum(1 for d in dist if d >= 0)
+    metrics["size"] = [width, height]
+    metrics["open_tiles"] = open_tiles
+    metrics["reachable_tiles"] = reachable
+
+    if exits:
+        exit_dist = safe[exits[-1]]
+        if dist[exits[-1]] < 0:
+            errors.append(f"exit at {xy(exits[-1])} is unreachable from the start")
+        elif exit_dist < 0:
+            errors.append(f"exit at {xy(exits[-1])} is only reachable through fake exits")
+        metrics["shortest_path"] = exit_dist
+    if compasses:
+        compass_dist = safe[compasses[-1]]
+        if dist[compasses[-1]] < 0:
+            warnings.append(f"compass at {xy(compasses[-1])} is unreachable from the start")
+        elif compass_dist < 0:
+            warnings.append(f"compass at {xy(compasses[-1])} is only reachable through fake exits")
+        metrics["compass_distance"] = compass_dist
+    if fakes:
+        metrics["fake_exits"] = len(fakes)
+        # ones the player can step onto without crossing another first
+        metrics["fake_exits_reachable"] = sum(
+            1 for i in fakes if max(safe[i + 1], safe[i - 1], safe[i + stride], safe[i - stride]) >= 0)
+
+    # monsters can only ever threaten the player if they share a region
+    monster_dists = [dist[i] for i in monsters]
+    unreachable = [xy(i) for i, d in zip(monsters, monster_dists) if d < 0]
+    if unreachable:
+        warnings.append(f"monsters that can never reach the player: {_short(unreachable)}")
+    metrics["monsters"] = len(monsters)
+    reachable_monsters = [d for d in monster_dists if d >= 0]
+    if reachable_monsters:
+        metrics["nearest_monster"] = min(reachable_monsters)
+
+    # layout: dead ends and junctions among reachable tiles
+    dead_ends = junctions = 0
+    for i, d in enumerate(dist):
+        if d >= 0:
+            exits_here = ((cells[i + 1] != WALL) + (cells[i - 1] != WALL) +
+                          (cells[i + stride] != WALL) + (cells[i - stride] != WALL))
+            dead_ends += exits_here == 1
+            junctions += exits_here >= 3
+    metrics["dead_ends"] = dead_ends
+    metrics["junctions"] = junctions
+
+    # a rough 0-100 score: longer paths, more branching and monsters
+    # close to the start make a level harder
+    path = metrics.get("shortest_path", -1)
+    if path > 0:
+        branching = (dead_ends + junctions) / max(1, reachable)
+        threat = sum(1 for d in reachable_monsters if d <= 2 * SIGHT_RADIUS) / max(1, len(monsters))
+        score = 40 * min(1.0, path / 200) + 40 * min(1.0, branching * 4) + 20 * threat
+        metrics["difficulty"] = round(score, 1)
+    return result
+
+def _check_safely(path):
+    # One unreadable or malformed file becomes an error entry instead of
+    # aborting the whole batch (and the cache save after it).
+    try:
+        return check_level(path)
+    except Exception as e:
+        return {"path": path, "errors": [f"check failed: {type(e).__name__}: {e}"],
+                "warnings": [], "metrics": {}}
+
+# ---------------- BATCH ----------------
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def collect(paths):
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, names in os.walk(p):
+                files.extend(os.path.join(root, n) for n in sorted(names)
+                             if n.endswith((".json", ".mzl")))
+        else:
+            files.append(p)
+    return files
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache.get("results", {}) if cache.get("version") == VERSION else {}
+
+def save_cache(path, results):
+    with open(path, "w") as f:
+        json.dump({"version": VERSION, "results": results}, f)
+
+def validate(paths, jobs=None, cache_path=None):
+    # Returns one result per file; only files whose contents changed since
+    # the cached run are analysed, in parallel across processes.
+    files = collect(paths)
+    cache = load_cache(cache_path) if cache_path else {}
+    hashes = {path: file_hash(path) for path in files}
+    todo = [path for path in files if hashes[path] not in cache]
+
+    if len(todo) > 1 and jobs != 1:
+        workers = jobs or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fresh = list(pool.map(_check_safely, todo, chunksize=max(1, len(todo) // (4 * workers))))
+    else:
+        fresh = [_check_safely(path) for path in todo]
+    for path, result in zip(todo, fresh):
+        cache[hashes[path]] = result
+
+    if cache_path:
+        save_cache(cache_path, cache)
+
+    results = []
+    for path in files:
+        result = dict(cache[hashes[path]])
+        result["path"] = path
+        result["cached"] = path not in todo
+        results.append(result)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and measure level files.")
+    parser.add_argument("paths", nargs="*", default=["levels"], help="level files or directories")
+    parser.add_argument("--jobs", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--cache", default=".level_cache.json", help="result cache file ('' to disable)")
+    parser.add_argument("--json", metavar="PATH", help="write the full report here")
+    parser.add_argument("--quiet", action="store_true", help="only print levels with problems")
+    args = parser.parse_args(argv)
+
+    results = validate(args.paths, args.jobs, args.cache or None)
+    failed = 0
+    for r in results:
+        failed += bool(r["errors"])
+        if args.quiet and not (r["errors"] or r["warnings"]):
+            continue
+        status = "FAIL" if r["errors"] else "ok"
+        m = r["metrics"]
+        summary = ", ".join(f"{k} {m[k]}" for k in ("shortest_path", "difficulty", "monsters") if k in m)
+        print(f"{status:4} {r['path']}" + (f"  ({summary})" if summary else "") +
+              ("  [cached]" if r["cached"] else ""))
+        for e in r["errors"]:
+            print(f"     error: {e}")
+        for w in r["warnings"]:
+            print(f"     warning: {w}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    print(f"{len(results)} levels, {failed} failed, "
+          f"{sum(not r['cached'] for r in results)} checked, {sum(r['cached'] for r in results)} cached")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,64 @@
+import math
+from collections import OrderedDict
+from settings import *
+from tiles import WALL
+
+class Visibility:
+    # Tile-to-tile line of sight within SIGHT_RADIUS. Each pair is walked
+    # once with an exact grid traversal between the tile centers and the
+    # answer is kept in an LRU cache, so repeated queries from monsters
+    # standing in the same tiles cost a dict lookup.
+    def __init__(self, maze, radius=SIGHT_RADIUS, cache_size=LOS_CACHE_SIZE):
+        self.maze = maze
+        self.radius = radius
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+
+    def can_see(self, ax, ay, bx, by):
+        if math.hypot(bx - ax, by - ay) > self.radius:
+            return False
+        a = self.maze.index(ax, ay)
+        b = self.maze.index(bx, by)
+        key = (a, b) if a < b else (b, a)
+
+        cache = self.cache
+        seen = cache.get(key)
+        if seen is None:
+            seen = self._trace(*key)
+            cache[key] = seen
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return seen
+
+    def _trace(self, a, b):
+        cells = self.maze.cells
+        stride = self.maze.stride
+        dx = b % stride - a % stride
+        dy = b // stride - a // stride
+        nx, ny = abs(dx), abs(dy)
+        sx = 1 if dx > 0 else -1
+        sy = stride if dy > 0 else -stride
+
+        i = a
+        ix = iy = 0
+        while ix < nx or iy < ny:
+            decision = (1 + 2 * ix) * ny - (1 + 2 * iy) * nx
+            if decision == 0:
+                # the line passes exactly through a corner: blocked if
+                # either tile touching it is a wall
+                if cells[i + sx] == WALL or cells[i + sy] == WALL:
+                    return False
+                i += sx + sy
+                ix += 1
+                iy += 1
+            elif decision < 0:
+                i += sx
+                ix += 1
+            else:
+                i += sy
+                iy += 1
+            if cells[i] == WALL:
+                return False
+        return True
\ No newline at end of file